@@ -0,0 +1,193 @@
+from __future__ import annotations
+from beginner.exceptions import BeginnerException
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import asyncio
+import time
+
+
+@dataclass
+class TokenBucket:
+    tokens: float
+    updated: float
+
+
+@dataclass
+class Ticket:
+    user_id: int
+    future: Optional[asyncio.Future] = field(default=None)
+
+
+class AdmissionController:
+    """Decides when code execution jobs may start. Each user has a token bucket that refills at a fixed rate, a job
+    costs one token. At most max_concurrency jobs run at once, the rest wait in per user queues that are served round
+    robin so one user queueing several jobs can't starve everyone else. Users who are idle long enough for their bucket
+    to be full again are forgotten, and the number of tracked users is bounded, so memory use doesn't grow over time."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 5,
+        seconds_per_token: float = 15.0,
+        burst: int = 2,
+        max_queued_per_user: int = 2,
+        max_users: int = 1024,
+    ):
+        self._max_concurrency = max_concurrency
+        self._seconds_per_token = seconds_per_token
+        self._burst = burst
+        self._max_queued_per_user = max_queued_per_user
+        self._max_users = max_users
+        self._buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+        self._waiting: OrderedDict[int, deque[Ticket]] = OrderedDict()
+        self._running = 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return sum(map(len, self._waiting.values()))
+
+    async def acquire(
+        self,
+        user_id: int,
+        on_queued: Optional[Callable[[int], Awaitable[Any]]] = None,
+    ) -> Ticket:
+        """Waits until the user's job may start. Raises Throttled if the user is out of tokens and QueueFull if they
+        already have too many jobs waiting. If the job has to wait on_queued is called with its position in the
+        queue. The ticket must be released once the job is done."""
+        queue = self._waiting.get(user_id, ())
+        if len(queue) >= self._max_queued_per_user:
+            raise QueueFull(
+                "You already have the maximum number of jobs waiting to run"
+            )
+
+        self._take_token(user_id)
+        ticket = Ticket(user_id)
+        if self._running < self._max_concurrency and not self._waiting:
+            self._running += 1
+            return ticket
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(ticket)
+        if on_queued:
+            await on_queued(self.position(ticket))
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            self._remove(ticket)
+            if ticket.future.done() and not ticket.future.cancelled():
+                self.release(ticket)  # Admitted just as it was cancelled
+            raise
+
+        return ticket
+
+    def release(self, ticket: Ticket):
+        """Frees the ticket's slot and admits waiting jobs into any free slots. Jobs that were cancelled while waiting
+        are skipped, so the slot goes to the next job that is still waiting."""
+        self._running -= 1
+        while self._waiting and self._running < self._max_concurrency:
+            user_id, queue = self._waiting.popitem(last=False)
+            next_ticket = queue.popleft()
+            if queue:
+                self._waiting[user_id] = queue  # Back of the line for the user's next job
+
+            if next_ticket.future.done():
+                continue  # Cancelled, its task hasn't run yet to take it out of the queue
+
+            self._running += 1
+            next_ticket.future.set_result(True)
+
+    def position(self, ticket: Ticket) -> int:
+        """Where the ticket is in the round robin order, the next ticket to be admitted is at position 1."""
+        queue = self._waiting.get(ticket.user_id)
+        if not queue or ticket not in queue:
+            return 0
+
+        index = queue.index(ticket)
+        position = 1 + sum(min(len(other), index) for other in self._waiting.values())
+        for user_id, other in self._waiting.items():
+            if user_id == ticket.user_id:
+                break
+
+            if len(other) > index:
+                position += 1
+
+        return position
+
+    def _take_token(self, user_id: int):
+        now = time.monotonic()
+        bucket = self._buckets.pop(user_id, None) or TokenBucket(self._burst, now)
+        refilled = (now - bucket.updated) / self._seconds_per_token
+        bucket.tokens = min(self._burst, bucket.tokens + refilled)
+        bucket.updated = now
+        if bucket.tokens < 1:
+            self._buckets[user_id] = bucket
+            raise Throttled(
+                "You're running code too often",
+                (1 - bucket.tokens) * self._seconds_per_token,
+            )
+
+        bucket.tokens -= 1
+        self._buckets[user_id] = bucket
+        self._expire_buckets(now)
+
+    def _expire_buckets(self, now: float):
+        """Buckets are kept in least recently used order, a bucket that would have refilled can be forgotten."""
+        refill = self._burst * self._seconds_per_token
+        while self._buckets:
+            user_id, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < refill and len(self._buckets) <= self._max_users:
+                return
+
+            del self._buckets[user_id]
+
+    def _remove(self, ticket: Ticket):
+        queue = self._waiting.get(ticket.user_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._waiting[ticket.user_id]
+
+
+class Cooldown:
+    """Remembers when keys were last used for a fixed period, keeping at most max_size keys."""
+
+    def __init__(self, seconds: float, max_size: int = 1024):
+        self._seconds = seconds
+        self._max_size = max_size
+        self._used: OrderedDict[Hashable, float] = OrderedDict()
+
+    def active(self, key: Hashable) -> bool:
+        self._prune(time.monotonic())
+        return key in self._used
+
+    def start(self, key: Hashable):
+        self._used.pop(key, None)
+        self._used[key] = time.monotonic()
+        self._prune(self._used[key])
+
+    def _prune(self, now: float):
+        while self._used:
+            key, used = next(iter(self._used.items()))
+            if now - used < self._seconds and len(self._used) <= self._max_size:
+                return
+
+            del self._used[key]
+
+
+class AdmissionError(BeginnerException):
+    pass
+
+
+class Throttled(AdmissionError):
+    @property
+    def retry_after(self) -> float:
+        return self.args[1]
+
+
+class QueueFull(AdmissionError):
+    pass
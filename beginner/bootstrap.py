@@ -2,10 +2,18 @@ import beginner.config as config
 import beginner.logging
 import nextcord.ext.commands
 import logging
-from beginner.models import set_database, PostgresqlDatabase, SqliteDatabase
+from beginner.models import (
+    set_database,
+    ReconnectingPooledPostgresqlDatabase,
+    SqliteDatabase,
+)
 
+from beginner.memory import resident_memory
+from beginner.message_cache import message_cache
+from typing import Dict, List, Tuple
 import os
 import pprint
+import time
 
 pprint.pprint(dict(os.environ))
 
@@ -22,6 +30,10 @@ def connect_db(logger):
     driver = db_settings("driver", env_name="DB_DRIVER", default="postgres")
     mode = "require" if db_settings("PRODUCTION_BOT", default=False) else None
     password = db_settings("pass", env_name="DB_PASSWORD")
+    workers = db_settings("workers", default=4)
+
+    max_connections = db_settings("max_connections", default=workers + 1)
+    stale_timeout = db_settings("stale_timeout", default=300)
 
     logger.debug(
         f"\nConnecting to database:\n"
@@ -31,12 +43,20 @@ def connect_db(logger):
         f"- Port {port}\n"
         f"- Mode {mode}\n"
         f"- Pass ******\n"
-        f"- Driver {driver}"
+        f"- Driver {driver}\n"
+        f"- Max Connections {max_connections}\n"
+        f"- Stale Timeout {stale_timeout}"
     )
 
     if driver == "postgres":
-        db = PostgresqlDatabase(
+        db = ReconnectingPooledPostgresqlDatabase(
             name,
+            max_connections=max_connections,
+            stale_timeout=stale_timeout,
+            timeout=db_settings("pool_timeout", default=10),
+            health_check_interval=db_settings("health_check_interval", default=30),
+            retries=db_settings("retries", default=3),
+            retry_backoff=db_settings("retry_backoff", default=0.5),
             user=user,
             host=host,
             port=port,
@@ -45,7 +65,7 @@ def connect_db(logger):
         )
     else:
         db = SqliteDatabase(f"{name}.sqlite.db")
-    set_database(db)
+    set_database(db, max_workers=workers)
 
 
 def create_bot(logger) -> nextcord.ext.commands.Bot:
@@ -65,16 +85,99 @@ def create_bot(logger) -> nextcord.ext.commands.Bot:
         intents=intents,
     )
     client.remove_command("help")
+    for event in (
+        "on_raw_reaction_add",
+        "on_raw_reaction_remove",
+        "on_raw_reaction_clear",
+        "on_raw_reaction_clear_emoji",
+    ):
+        client.add_listener(_forget_reacted_message, event)
     return client
 
 
+async def _forget_reacted_message(payload):
+    """Drops the reacted message from the message cache so its reactions are current when cogs fetch it. This is
+    added before any cog's listeners so it runs before they fetch the message."""
+    message_cache.invalidate(payload.message_id)
+
+
 def load_cogs(client: nextcord.ext.commands.Bot, logger):
     logger.debug("Loading cogs")
+    report = []
+    for path, enabled in _get_cogs().items():
+        if not enabled:
+            logger.debug(f"DISABLED - {path}")
+            continue
+
+        memory = resident_memory()
+        start = time.perf_counter()
+        client.load_extension(path)
+        report.append((path, time.perf_counter() - start, resident_memory() - memory))
+        logger.debug(f"LOADED - {path}")
+
+    _log_cog_report(report, logger)
+
+
+def _log_cog_report(report: List[Tuple[str, float, int]], logger):
+    """Logs how long each cog took to import & set up and how much memory it added. Modules shared by several cogs are
+    counted against the first cog that imports them."""
+    lines = [f"{'Cog':<36}{'Time (ms)':>12}{'Memory (KiB)':>14}"]
+    for path, seconds, memory in sorted(report, key=lambda cog: -cog[1]):
+        lines.append(f"{path:<36}{seconds * 1000:>12.1f}{memory // 1024:>14,}")
+    lines.append(
+        f"{'Total':<36}{sum(cog[1] for cog in report) * 1000:>12.1f}"
+        f"{sum(cog[2] for cog in report) // 1024:>14,}"
+    )
+    logger.info("Loaded cogs:\n" + "\n".join(lines))
+
+
+def watch_config(client: nextcord.ext.commands.Bot, logger):
+    """Reloads the config files when they change. Cogs are told which scopes changed by the config_changed event and
+    cogs that have been enabled or disabled in the config are loaded or unloaded."""
+    interval = beginner.config.get_setting(
+        "config_reload_interval", scope="bot", default=10
+    )
+    if not interval:
+        logger.debug("Config reloading is disabled")
+        return
+
+    cogs = _get_cogs()
+
+    @beginner.config.subscribe
+    def update_cogs(scopes):
+        nonlocal cogs
+        client.dispatch("config_changed", scopes)
+        if "cogs" not in scopes:
+            return
+
+        previous, cogs = cogs, _get_cogs()
+        for path in previous.keys() | cogs.keys():
+            enabled = cogs.get(path, False)
+            if enabled == previous.get(path, False):
+                continue
+
+            try:
+                if enabled:
+                    client.load_extension(path)
+                else:
+                    client.unload_extension(path)
+            except nextcord.ext.commands.ExtensionError as exc:
+                logger.error(f"Couldn't update cog {path} after a config change: {exc}")
+            else:
+                logger.info(f"{'LOADED' if enabled else 'UNLOADED'} - {path}")
+
+    beginner.config.watcher.interval = interval
+    beginner.config.watcher.start(client.loop)
+
+
+def _get_cogs() -> Dict[str, bool]:
+    """Maps the import path of every cog in the config to whether it's enabled."""
     files = (
         "production"
         if beginner.config.get_setting("PRODUCTION_BOT")
         else "development",
     )
+    cogs = {}
     for cog, settings in beginner.config.get_scope("cogs", filenames=files):
         enabled = (
             settings if isinstance(settings, bool) else settings.get("enabled", True)
@@ -84,11 +187,8 @@ def load_cogs(client: nextcord.ext.commands.Bot, logger):
             if isinstance(settings, bool) or not settings.get("from")
             else settings.get("from")
         )
-        if enabled:
-            logger.debug(f"LOADED - {path}")
-            client.load_extension(path)
-        else:
-            logger.debug(f"DISABLED - {path}")
+        cogs[path] = enabled
+    return cogs
 
 
 def run(client, logger):
@@ -1,115 +1,153 @@
-from queue import LifoQueue
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 
-class BrainfuckInterpreter:
-    def __init__(self, code: str, data_in: str = ""):
-        self._code = code
-        self._exception = None
-        self._in = data_in
-        self._instruction_pointer = 0
-        self._out = ""
-        self._register_pointer = 0
-        self._registers = [0] * 30000
-        self._stack = LifoQueue()
-        self._generation = 0
-
-    @property
-    def register(self):
-        return self._registers[self._register_pointer]
-
-    @register.setter
-    def register(self, value):
-        self._registers[self._register_pointer] = value
-
-    def run(self) -> Tuple[str, Optional[str]]:
-        instructions = {
-            "[": self._jump_forward,
-            "]": self._jump_back,
-            ">": self._increment_register_pointer,
-            "<": self._decrement_register_pointer,
-            "+": self._increment_register,
-            "-": self._decrement_register,
-            ".": self._print,
-            ",": self._read,
-        }
-        while self._instruction_pointer < len(self._code) and not self._exception:
-            if self._generation >= 1000000:
-                self._exception = "Code took too long to run"
-                break
-
-            instruction = self._code[self._instruction_pointer]
-            if instruction in instructions:
-                self._instruction_pointer = instructions[instruction]()
-            else:
-                self._instruction_pointer += 1
-
-            self._generation += 1
-
-        return self._out, self._exception
-
-    def _jump_forward(self) -> int:
-        if self.register == 0:
-            return self._find_next_back_jump() + 1
+# Instructions that brainfuck code is compiled to
+ADD, MOVE, JUMP_FORWARD, JUMP_BACK, CLEAR, PRINT, READ = range(7)
 
-        self._stack.put(self._instruction_pointer)
-        return self._instruction_pointer + 1
+Instruction = Tuple[int, int, int]  # Op code, argument, position in the source code
 
-    def _jump_back(self) -> int:
-        if self._stack.empty():
-            return self._instruction_pointer + 1
 
-        return self._stack.get()
-
-    def _increment_register_pointer(self) -> int:
-        self._register_pointer += 1
-        if self._register_pointer == len(self._registers):
-            self._registers.append(0)
-
-        return self._instruction_pointer + 1
-
-    def _decrement_register_pointer(self) -> int:
-        self._register_pointer -= 1
-        return self._instruction_pointer + 1
+class BrainfuckInterpreter:
+    """Runs brainfuck code by first compiling it to a list of instructions. Runs of +/- and >/< are folded into a
+    single instruction, clear loops ([-] & [+]) become a single instruction, and the jump targets of every bracket are
+    resolved ahead of time. Each compiled instruction counts as one generation."""
 
-    def _increment_register(self) -> int:
-        self.register += 1
-        self.register %= 256
-        return self._instruction_pointer + 1
+    max_generations = 1_000_000
+    tape_size = 30_000
 
-    def _decrement_register(self) -> int:
-        self.register -= 1
-        self.register %= 256
-        return self._instruction_pointer + 1
+    def __init__(self, code: str, data_in: str = ""):
+        self._code = code
+        self._in = data_in
 
-    def _print(self) -> int:
-        if 0 > self.register or self.register > 255:
-            self._exception = f"Cannot decode character {self.register} at instruction {self._instruction_pointer}"
-            return -1
+    def run(self) -> Tuple[str, Optional[str]]:
+        try:
+            instructions = self.compile(self._code)
+        except BrainfuckCompileError as exc:
+            return "", exc.args[0]
+
+        return self._execute(instructions)
+
+    @staticmethod
+    def compile(code: str) -> List[Instruction]:
+        instructions: List[Instruction] = []
+        open_brackets: List[int] = []
+        for position, char in enumerate(code):
+            if char in "+-":
+                value = 1 if char == "+" else -1
+                if instructions and instructions[-1][0] == ADD:
+                    _, arg, start = instructions.pop()
+                    value += arg
+                else:
+                    start = position
+                instructions.append((ADD, value, start))
+
+            elif char in "><":
+                value = 1 if char == ">" else -1
+                if instructions and instructions[-1][0] == MOVE:
+                    _, arg, start = instructions.pop()
+                    value += arg
+                else:
+                    start = position
+                instructions.append((MOVE, value, start))
+
+            elif char == "[":
+                open_brackets.append(len(instructions))
+                instructions.append((JUMP_FORWARD, -1, position))
+
+            elif char == "]":
+                if not open_brackets:
+                    continue  # Unmatched back jumps are ignored
+
+                start = open_brackets.pop()
+                body = instructions[start + 1 :]
+                if len(body) == 1 and body[0][0] == ADD and body[0][1] % 2:
+                    # An odd step will always reach zero, so the loop just clears the register
+                    bracket_position = instructions[start][2]
+                    del instructions[start:]
+                    instructions.append((CLEAR, 0, bracket_position))
+                    continue
+
+                instructions[start] = (
+                    JUMP_FORWARD,
+                    len(instructions),
+                    instructions[start][2],
+                )
+                instructions.append((JUMP_BACK, start, position))
+
+            elif char == ".":
+                instructions.append((PRINT, 0, position))
+
+            elif char == ",":
+                instructions.append((READ, 0, position))
+
+        if open_brackets:
+            raise BrainfuckCompileError(
+                f"No back jump found after the instruction {instructions[open_brackets[-1]][2]}"
+            )
 
-        self._out += chr(self.register)
-        return self._instruction_pointer + 1
+        return instructions
+
+    def _execute(self, instructions: List[Instruction]) -> Tuple[str, Optional[str]]:
+        ops = [op for op, _, _ in instructions]
+        args = [arg for _, arg, _ in instructions]
+        tape = bytearray(self.tape_size)
+        out = bytearray()
+        data_in = self._in
+        read_pointer = 0
+        pointer = 0
+        pc = 0
+        generation = 0
+        exception = None
+        end = len(ops)
+        max_generations = self.max_generations
+        while pc < end:
+            if generation >= max_generations:
+                exception = "Code took too long to run"
+                break
 
-    def _read(self) -> int:
-        if not self._in:
-            self._exception = (
-                f"Nothing left to read at instruction {self._instruction_pointer}"
-            )
-            return -1
-
-        char = self._in[0]
-        if char > 255:
-            self._exception = f"Cannot encode character '{char}' at instruction {self._instruction_pointer}"
-            return -1
-
-        self._in = self._in[1:]
-        self.register = ord(char)
-        return self._instruction_pointer + 1
-
-    def _find_next_back_jump(self) -> int:
-        index = self._code.find("]", self._instruction_pointer + 1)
-        if index < 0:
-            self._exception = (
-                f"No back jump found after the instruction {self._instruction_pointer}"
-            )
-        return index
+            generation += 1
+            op = ops[pc]
+            if op == ADD:
+                tape[pointer] = (tape[pointer] + args[pc]) & 255
+            elif op == MOVE:
+                pointer += args[pc]
+                if pointer < 0:
+                    exception = f"Moved before the first register at instruction {instructions[pc][2]}"
+                    break
+                if pointer >= len(tape):
+                    tape.extend(bytes(pointer - len(tape) + 1))
+            elif op == JUMP_BACK:
+                if tape[pointer]:
+                    pc = args[pc]
+            elif op == JUMP_FORWARD:
+                if not tape[pointer]:
+                    pc = args[pc]
+            elif op == CLEAR:
+                tape[pointer] = 0
+            elif op == PRINT:
+                out.append(tape[pointer])
+            elif op == READ:
+                if read_pointer >= len(data_in):
+                    exception = f"Nothing left to read at instruction {instructions[pc][2]}"
+                    break
+
+                char = data_in[read_pointer]
+                if ord(char) > 255:
+                    exception = f"Cannot encode character '{char}' at instruction {instructions[pc][2]}"
+                    break
+
+                read_pointer += 1
+                tape[pointer] = ord(char)
+
+            pc += 1
+
+        return out.decode("latin-1"), exception
+
+
+def run_brainfuck(code: str, data_in: str = "") -> Tuple[str, Optional[str]]:
+    """ Runs brainfuck code, used as the entry point when running on a worker process. """
+    return BrainfuckInterpreter(code, data_in).run()
+
+
+class BrainfuckCompileError(Exception):
+    ...
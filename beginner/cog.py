@@ -1,6 +1,8 @@
 from __future__ import annotations
 from beginner.config import get_setting
+from beginner.guild_index import guild_index
 from beginner.logging import get_logger
+from beginner.message_cache import message_cache
 from beginner.settings import Settings
 from beginner.tags import TaggableMeta
 from nextcord.ext import commands
@@ -10,10 +12,24 @@ from nextcord import (
     Guild,
     Emoji,
     CategoryChannel,
+    Message,
+    abc,
+    RawReactionActionEvent,
     Role,
     slash_command,
 )
-from typing import Any, AnyStr, Coroutine, List, Optional
+from typing import (
+    Any,
+    AnyStr,
+    Callable,
+    Coroutine,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+)
+import functools
 import json
 import os.path
 
@@ -23,6 +39,9 @@ class Cog(commands.Cog, metaclass=TaggableMeta):
         self.settings = Settings()
         self.client = client
         self.logger = get_logger(("beginner.py", self.__class__.__name__))
+        self._reaction_handlers = self._find_reaction_handlers()
+        self._server: Optional[Guild] = None
+        self._resolved: Dict[str, Any] = {}
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -32,23 +51,132 @@ class Cog(commands.Cog, metaclass=TaggableMeta):
     async def ready(self):
         return
 
+    @commands.Cog.listener("on_ready")
+    @commands.Cog.listener("on_resumed")
+    @commands.Cog.listener("on_guild_available")
+    @commands.Cog.listener("on_guild_unavailable")
+    @commands.Cog.listener("on_guild_update")
+    @commands.Cog.listener("on_config_changed")
+    async def _server_changed(self, *_):
+        self.invalidate_resolved()
+
+    @commands.Cog.listener("on_guild_channel_create")
+    @commands.Cog.listener("on_guild_channel_delete")
+    async def _index_channel_changed(self, channel: abc.GuildChannel):
+        guild_index.invalidate(channel.guild.id, "channels", "categories")
+        self._resolved.clear()
+
+    @commands.Cog.listener("on_guild_channel_update")
+    async def _index_channel_updated(
+        self, before: abc.GuildChannel, after: abc.GuildChannel
+    ):
+        guild_index.invalidate(after.guild.id, "channels", "categories")
+        self._resolved.clear()
+
+    @commands.Cog.listener("on_guild_role_create")
+    @commands.Cog.listener("on_guild_role_delete")
+    async def _index_role_changed(self, role: Role):
+        guild_index.invalidate(role.guild.id, "roles")
+        self._resolved.clear()
+
+    @commands.Cog.listener("on_guild_role_update")
+    async def _index_role_updated(self, before: Role, after: Role):
+        guild_index.invalidate(after.guild.id, "roles")
+        self._resolved.clear()
+
+    @commands.Cog.listener("on_guild_emojis_update")
+    async def _index_emojis_updated(
+        self, guild: Guild, before: Sequence[Emoji], after: Sequence[Emoji]
+    ):
+        guild_index.invalidate(guild.id, "emojis")
+        self._resolved.clear()
+
+    @commands.Cog.listener("on_raw_reaction_add")
+    async def _dispatch_reaction_add(self, reaction: RawReactionActionEvent):
+        await self._dispatch_reaction("add", reaction)
+
+    @commands.Cog.listener("on_raw_reaction_remove")
+    async def _dispatch_reaction_remove(self, reaction: RawReactionActionEvent):
+        await self._dispatch_reaction("remove", reaction)
+
+    async def _dispatch_reaction(self, event: str, reaction: RawReactionActionEvent):
+        """Calls the reaction handlers that are interested in the reaction's emoji, the message is only fetched if at
+        least one handler is interested."""
+        handlers = [
+            handler
+            for handler in self._reaction_handlers.get(event, ())
+            if not handler.__reaction_emojis__
+            or reaction.emoji.name in handler.__reaction_emojis__
+            or reaction.emoji.id in handler.__reaction_emojis__
+        ]
+        if not handlers:
+            return
+
+        message = await self.fetch_message(
+            self.client.get_channel(reaction.channel_id), reaction.message_id
+        )
+        for handler in handlers:
+            try:
+                await handler(reaction, message)
+            except Exception:
+                self.logger.exception(
+                    f"Reaction handler {handler.__name__} failed on {event}"
+                )
+
+    def _find_reaction_handlers(self) -> Dict[str, List[Callable]]:
+        handlers = {}
+        for base in reversed(type(self).__mro__):
+            for name, attr in base.__dict__.items():
+                if hasattr(attr, "__reaction_emojis__"):
+                    handlers[name] = attr.__reaction_event__
+                else:
+                    handlers.pop(name, None)
+
+        reaction_handlers = {}
+        for name, event in handlers.items():
+            reaction_handlers.setdefault(event, []).append(getattr(self, name))
+        return reaction_handlers
+
+    async def fetch_message(self, channel: TextChannel, message_id: int) -> Message:
+        """Fetches a message using the message cache that is shared by all cogs."""
+        return await message_cache.fetch(channel, message_id)
+
     @property
     def server(self) -> Guild:
-        return self.client.get_guild(get_setting("guild_id", scope="bot"))
+        """The bot's guild, it's looked up on first use and kept until the guild changes or the bot reconnects."""
+        if self._server is None:
+            self._server = self.client.get_guild(get_setting("guild_id", scope="bot"))
+        return self._server
+
+    def invalidate_resolved(self):
+        """Forgets the server and every value memoized with Cog.resolved so they're looked up again on next use."""
+        self._server = None
+        self._resolved.clear()
 
     def get_emoji(self, name: AnyStr, default: Optional[Any] = None) -> Emoji:
-        return self.get(self.server.emojis, name, default)
+        return self._get_indexed("emojis", name, default)
 
     def get_category(
         self, name: AnyStr, default: Optional[Any] = None
     ) -> CategoryChannel:
-        return self.get(self.server.categories, name, default, preserve_case=True)
+        return self._get_indexed("categories", name, default)
 
     def get_channel(self, name: AnyStr, default: Optional[Any] = None) -> TextChannel:
-        return self.get(self.server.channels, name, default)
+        return self._get_indexed("channels", name, default)
 
     def get_role(self, name: AnyStr, default: Optional[Any] = None) -> Role:
-        return self.get(self.server.roles, name, default, preserve_case=False)
+        return self._get_indexed("roles", name, default, preserve_case=False)
+
+    def _get_indexed(
+        self,
+        kind: str,
+        name: AnyStr,
+        default: Optional[Any] = None,
+        preserve_case: bool = True,
+    ):
+        """Looks up a server entity by name using the shared guild index rather than searching the server's list."""
+        entity = guild_index.get(self.server, kind, name, preserve_case)
+        return default if entity is None else entity
 
     def get(
         self,
@@ -93,6 +221,67 @@ class Cog(commands.Cog, metaclass=TaggableMeta):
     def slash_command(*args, **kwargs) -> slash_command:
         return slash_command(*args, **kwargs)
 
+    @staticmethod
+    def reaction(*emojis, event: str = "add") -> Callable:
+        """Registers a method to handle raw reaction events. The method is passed the raw reaction event and the
+        message that was reacted to. When emoji names or IDs are given the method is only called for reactions that
+        use one of them. Event can be "add" or "remove"."""
+
+        def decorator(func: Callable) -> Callable:
+            func.__reaction_emojis__ = frozenset(emojis)
+            func.__reaction_event__ = event
+            return func
+
+        return decorator
+
+    @staticmethod
+    def resolved(
+        func: Optional[Callable[[Cog], Any]] = None,
+        *,
+        key: Optional[Callable[[Cog], Hashable]] = None,
+    ) -> property:
+        """Memoizes a property that resolves server entities such as channels, roles, and emojis. The value is kept
+        until a channel, role, or emoji changes, the guild is updated, or the bot reconnects. Values that are None or
+        that contain None anywhere in their dicts, lists, tuples, or sets aren't memoized so lookups that failed, such
+        as those made before the bot is ready, are retried.
+
+        Entities that are looked up by a setting should pass a key function that returns the setting, the value is
+        resolved again whenever the key changes."""
+        if func is None:
+            return functools.partial(Cog.resolved, key=key)
+
+        name = func.__name__
+
+        @functools.wraps(func)
+        def getter(self: Cog) -> Any:
+            current = key(self) if key else None
+            memo = self._resolved.get(name)
+            if memo is None or memo[0] != current:
+                value = func(self)
+                if not _fully_resolved(value):
+                    self._resolved.pop(name, None)
+                    return value
+
+                memo = self._resolved[name] = (current, value)
+            return memo[1]
+
+        return property(getter)
+
+
+def _fully_resolved(value: Any) -> bool:
+    if value is None:
+        return False
+
+    if isinstance(value, dict):
+        return all(map(_fully_resolved, value.keys())) and all(
+            map(_fully_resolved, value.values())
+        )
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(map(_fully_resolved, value))
+
+    return True
+
 
 class AdvancedCommand:
     def __init__(self, default: Coroutine, fail: Optional[Coroutine] = None):
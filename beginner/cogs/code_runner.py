@@ -1,27 +1,32 @@
 import os
 
+from beginner.admission import AdmissionController, Cooldown, QueueFull, Throttled
 from beginner.cog import Cog
 from beginner.colors import *
-from beginner.brainfuck_runner import BrainfuckInterpreter
-from datetime import datetime, timedelta
-from typing import Tuple, Literal
+from beginner.config import scope_getter
+from beginner.lambda_invoker import LambdaInvoker, LocalLambdaClient
+from beginner.lazy import lazy_import
+from beginner.result_cache import ResultCache, file_version
+from beginner.runner_telemetry import RunnerTelemetry
+from beginner.runner_pool import (
+    RunnerCrashed,
+    RunnerPool,
+    RunnerQueueFull,
+    RunnerTimedOut,
+)
+from importlib import metadata
+from typing import Any, Awaitable, Callable, Literal, Optional, Tuple
 import asyncio
-import black
 import dis
 import nextcord
-from nextcord.ext.commands import (
-    BucketType,
-    Context,
-    cooldown,
-    guild_only,
-    max_concurrency,
-)
+from nextcord.ext.commands import Context, guild_only
 import io
 import json
 import pathlib
 import re
-import boto3
-from botocore.config import Config
+
+boto3 = lazy_import("boto3")
+botocore_config = lazy_import("botocore.config")
 
 CODE_RUNNING_LOG_CHANNEL_ID = 1193007835332747404
 
@@ -29,7 +34,9 @@ CODE_RUNNING_LOG_CHANNEL_ID = 1193007835332747404
 class CodeRunner(Cog):
     def __init__(self, client):
         super().__init__(client)
-        self._exec_rate_limit = {}
+        self._rerun_cooldown = Cooldown(120)
+        self._preload_reported = False
+        self._telemetry = RunnerTelemetry()
         self._code_runner_emojis = {"▶️", "⏯"}
         self._formatting_emojis = {"✏️", "📝"}
         self._delete_emojis = ("🗑️",)
@@ -44,21 +51,127 @@ class CodeRunner(Cog):
             "py": self._run_python,
         }
 
-        session = boto3.Session(
-            aws_access_key_id=os.environ.get("BEGINNER_PYTHON_RUNNER_ACCESS_KEY"),
-            aws_secret_access_key=os.environ.get("BEGINNER_PYTHON_RUNNER_SECRET_KEY"),
+        runner_settings = scope_getter("code_runner")
+        self._admission = AdmissionController(
+            max_concurrency=runner_settings("max_concurrency", default=5),
+            seconds_per_token=runner_settings("seconds_per_run", default=15),
+            burst=runner_settings("run_burst", default=2),
+            max_queued_per_user=runner_settings("max_queued_per_user", default=2),
+        )
+        # Formatting is cheap next to running code so it has its own buckets, formatting doesn't use up runs
+        self._format_admission = AdmissionController(
+            max_concurrency=runner_settings("max_concurrency", default=5),
+            seconds_per_token=runner_settings("seconds_per_format", default=5),
+            burst=runner_settings("format_burst", default=3),
+            max_queued_per_user=runner_settings("max_queued_per_user", default=2),
+        )
+        self._runner_pool = RunnerPool(
+            size=runner_settings("pool_size", default=4),
+            queue_depth=runner_settings("queue_depth", default=16),
+            preload=["beginner.runner_preload"],
+            warm_up="beginner.runner:warm_up",
+        )
+        # Brainfuck & black are pure Python and CPU bound so they get their own pool to keep them off the event loop
+        self._cpu_pool = RunnerPool(
+            size=runner_settings("cpu_pool_size", default=2),
+            queue_depth=runner_settings("queue_depth", default=16),
+            timeout=runner_settings("cpu_timeout", default=5),
+            preload=["beginner.brainfuck_runner", "beginner.runner_format"],
+            cpu_limit=runner_settings("cpu_limit", default=2),
+        )
+
+        # The Lambda client is created the first time !run needs it, creating it imports boto3 & botocore
+        self._lambda: Optional[LambdaInvoker] = None
+        self._lambda_lock = asyncio.Lock()
+
+        beginner_dir = pathlib.Path(__file__).parent.parent
+        self._results = ResultCache(
+            ttl=runner_settings("cache_ttl", default=600),
+            max_size=runner_settings("cache_size", default=512),
+            version=f"{metadata.version('black')}-"
+            + file_version(
+                beginner_dir / name
+                for name in ("runner.py", "allowed_modules.txt", "brainfuck_runner.py")
+            ),
+        )
+
+    async def ready(self):
+        self._runner_pool.start()
+        self._cpu_pool.start()
+        if not self._preload_reported:
+            await self._log_preload_report()
+
+    async def _log_preload_report(self):
+        """Logs how long each module allowed in the sandbox took to import in the runner fork server and how much
+        memory it added. Ready runs again after every reconnect, the report is only fetched until it's been logged
+        once since fetching it uses up a worker."""
+        try:
+            report = await self._runner_pool.run("beginner.runner_preload:get_report")
+        except Exception as exc:
+            self.logger.warning(f"Couldn't get the runner preload report: {exc!r}")
+            return
+
+        self._preload_reported = True
+
+        lines = [f"{'Module':<20}{'Time (ms)':>12}{'Memory (KiB)':>14}"]
+        for module in sorted(report, key=lambda module: -module["seconds"]):
+            lines.append(
+                f"{module['module']:<20}{module['seconds'] * 1000:>12.1f}"
+                f"{module['memory'] // 1024:>14,}"
+                + (f"  {module['error']}" if module["error"] else "")
+            )
+        lines.append(
+            f"{'Total':<20}{sum(module['seconds'] for module in report) * 1000:>12.1f}"
+            f"{sum(module['memory'] for module in report) // 1024:>14,}"
         )
+        self.logger.info("Preloaded runner modules\n" + "\n".join(lines))
+
+    def cog_unload(self):
+        self._runner_pool.close()
+        self._cpu_pool.close()
+        if self._lambda:
+            self._lambda.close()
+
+    async def _get_lambda(self) -> LambdaInvoker:
+        """Creates the Lambda invoker on first use, in a worker thread since importing boto3 is slow."""
+        async with self._lambda_lock:
+            if not self._lambda:
+                self._lambda = await asyncio.get_running_loop().run_in_executor(
+                    None, self._create_lambda
+                )
+        return self._lambda
+
+    def _create_lambda(self) -> LambdaInvoker:
+        runner_settings = scope_getter("code_runner")
+        lambda_timeout = runner_settings("lambda_timeout", default=30)
+        if runner_settings("local_lambda", default=False):
+            lambda_client = LocalLambdaClient()
+        else:
+            session = boto3.Session(
+                aws_access_key_id=os.environ.get("BEGINNER_PYTHON_RUNNER_ACCESS_KEY"),
+                aws_secret_access_key=os.environ.get(
+                    "BEGINNER_PYTHON_RUNNER_SECRET_KEY"
+                ),
+            )
+
+            lambda_config = botocore_config.Config(
+                retries={"max_attempts": 5, "mode": "standard"},
+                connect_timeout=5,
+                read_timeout=lambda_timeout,
+            )
 
-        lambda_config = Config(retries={"max_attempts": 5, "mode": "standard"})
+            lambda_client = session.client(
+                "lambda", region_name="ca-central-1", config=lambda_config
+            )
 
-        self._lambda_client = session.client(
-            "lambda", region_name="ca-central-1", config=lambda_config
+        return LambdaInvoker(
+            lambda_client,
+            max_concurrency=runner_settings("lambda_concurrency", default=5),
+            timeout=lambda_timeout,
         )
 
     @Cog.command()
-    @cooldown(1, 15.0, BucketType.user)
     @guild_only()
-    @max_concurrency(5)
     async def run(self, ctx: Context):
         match re.search(
             r"```([a-zA-Z0-9_]+)\s*?\n((?:.|\n)+?)```(?:\n((?:.|\n)+))?",
@@ -101,7 +214,13 @@ class CodeRunner(Cog):
                             ),
                         )
 
-                        stdout, exception = await runner(code, stdin)
+                        result = await self._admitted(
+                            ctx.author, ctx.channel, runner, code, stdin
+                        )
+                        if not result:
+                            return
+
+                        stdout, exception = result
                         if exception:
                             title = f"Error: Code Raised an Exception"
                             description = f"```\n{self._restrict_output_length(stdout)}\n\n{exception}\n```"
@@ -152,11 +271,13 @@ class CodeRunner(Cog):
         return result
 
     async def _run_python(self, code: str, stdin: str) -> tuple[str, Literal[""] | str]:
-        response = self._lambda_client.invoke(
-            FunctionName="CodeRunner:live",
-            Payload=json.dumps({"code": code, "stdin": stdin}),
-        )
-        payload = json.loads(response["Payload"].read().decode())
+        try:
+            lambda_invoker = await self._get_lambda()
+            payload = await lambda_invoker.invoke(
+                "CodeRunner:live", {"code": code, "stdin": stdin}
+            )
+        except asyncio.TimeoutError:
+            return "", "Beginnerpy.ScriptTimedOut: The code runner took too long to respond"
 
         if self._aws_error_key in payload:
             return "", payload[self._aws_error_key]
@@ -174,28 +295,35 @@ class CodeRunner(Cog):
         source = re.match(
             r"^(?:```(?:py|python)\n)?\n?(.+?)(?:\n```)?$", content, re.DOTALL
         ).groups()[0]
+        key = self._results.key("dis", source)
+        if not (result := self._results.get(key)):
+            result = self._disassemble(source)
+            if result[2] == BLUE:
+                self._results.set(key, result)
+
+        title, description, color = result
+        await ctx.send(
+            embed=nextcord.Embed(title=title, description=description, color=color)
+        )
+
+    def _disassemble(self, source: str) -> Tuple[str, str, int]:
         buffer = io.StringIO()
         try:
             code = compile(source, "<discord>", "exec")
         except SyntaxError as excp:
             msg, (file, line_no, column, line) = excp.args
             spaces = " " * (column - 1)
-            await ctx.send(
-                embed=nextcord.Embed(
-                    title="Disassemble - Exception",
-                    description=f"```py\nLine {line_no}\n{line.rstrip()}\n{spaces}^\nSyntaxError: {msg}\n```",
-                    color=YELLOW,
-                )
+            return (
+                "Disassemble - Exception",
+                f"```py\nLine {line_no}\n{line.rstrip()}\n{spaces}^\nSyntaxError: {msg}\n```",
+                YELLOW,
             )
-            return
 
         dis.dis(code, file=buffer)
-        await ctx.send(
-            embed=nextcord.Embed(
-                title="Disassemble - Byte Code Instructions",
-                description=f"```asm\n{buffer.getvalue()}\n```",
-                color=BLUE,
-            )
+        return (
+            "Disassemble - Byte Code Instructions",
+            f"```asm\n{buffer.getvalue()}\n```",
+            BLUE,
         )
 
     @Cog.command()
@@ -203,7 +331,9 @@ class CodeRunner(Cog):
         if content.strip().startswith("```bf") or content.strip().startswith(
             "```brainfuck"
         ):
-            await self._exec_brainfuck(ctx.message, content)
+            await self._admitted(
+                ctx.author, ctx.channel, self._exec_brainfuck, ctx.message, content
+            )
             return
 
         if content.strip() == "modules":
@@ -228,10 +358,54 @@ class CodeRunner(Cog):
             )
             return
 
+        if content.strip() == "cache":
+            stats = self._results.stats()
+            lookups = stats["hits"] + stats["misses"]
+            await ctx.send(
+                embed=nextcord.Embed(
+                    description=(
+                        f"**Hits:** {stats['hits']:,}\n**Misses:** {stats['misses']:,}\n"
+                        f"**Hit Rate:** {stats['hits'] / (lookups or 1):.0%}\n"
+                        f"**Cached Results:** {stats['size']:,}"
+                    ),
+                    title="✅ Exec/Eval Result Cache",
+                    color=BLUE,
+                )
+            )
+            return
+
+        if content.strip() == "stats":
+            embed = nextcord.Embed(title="✅ Exec/Eval Runner Stats", color=BLUE)
+            for mode in self._telemetry.modes:
+                summary = self._telemetry.summary(mode)
+                embed.add_field(
+                    name=f"{mode} ({summary['runs']:,} runs)",
+                    value="\n".join(
+                        [
+                            f"**Failed:** {summary['failed']:,} **Truncated:** {summary['truncated']:,}",
+                            *(
+                                f"**{label}:** p50 {summary[metric]['p50']:,.1f} "
+                                f"p95 {summary[metric]['p95']:,.1f} max {summary[metric]['max']:,.1f}"
+                                for metric, label in (
+                                    ("wall_ms", "Time (ms)"),
+                                    ("cpu_ms", "CPU (ms)"),
+                                    ("peak_rss_mb", "Memory (MiB)"),
+                                )
+                            ),
+                        ]
+                    ),
+                    inline=False,
+                )
+            await ctx.send(embed=embed)
+            return
+
         message: nextcord.Message = ctx.message
         if message.reference:
             ref_message = await ctx.channel.fetch_message(message.reference.message_id)
-            await self._exec(
+            await self._admitted(
+                ctx.author,
+                ctx.channel,
+                self._exec,
                 ctx.message,
                 ref_message.content[ref_message.content.find("`") :].strip(),
                 ctx.author,
@@ -239,23 +413,15 @@ class CodeRunner(Cog):
             )
             return
 
-        await self._exec(ctx.message, content, ctx.author)
-
-    @Cog.listener()
-    async def on_raw_reaction_add(self, reaction: nextcord.RawReactionActionEvent):
-        if (
-            reaction.emoji.name
-            not in self._code_runner_emojis
-            | self._formatting_emojis
-            | self._delete_emojis_set
-        ):
-            return
+        await self._admitted(
+            ctx.author, ctx.channel, self._exec, ctx.message, content, ctx.author
+        )
 
-        now = datetime.utcnow()
-        delta = now - self._exec_rate_limit.get(reaction.message_id, now)
-        channel: nextcord.TextChannel = self.client.get_channel(reaction.channel_id)
-        message = await channel.fetch_message(reaction.message_id)
-        if timedelta(seconds=0) < delta < timedelta(minutes=2):
+    @Cog.reaction("▶️", "⏯", "✏️", "📝", "🗑️")
+    async def on_code_reaction(
+        self, reaction: nextcord.RawReactionActionEvent, message: nextcord.Message
+    ):
+        if self._rerun_cooldown.active(reaction.message_id):
             await message.remove_reaction(reaction.emoji, reaction.member)
             return
 
@@ -263,15 +429,30 @@ class CodeRunner(Cog):
         if member.bot:
             return
 
-        self._exec_rate_limit[reaction.message_id] = now
+        self._rerun_cooldown.start(reaction.message_id)
 
         if reaction.emoji.name in self._code_runner_emojis and self.settings.get(
             "EXEC_ENABLED", False
         ):
-            await self._exec(message, message.content, reaction.member)
+            await self._admitted(
+                member,
+                message.channel,
+                self._exec,
+                message,
+                message.content,
+                reaction.member,
+            )
 
         elif reaction.emoji.name in self._formatting_emojis:
-            await self._black_formatting(message, message.content, reaction.member)
+            await self._admitted(
+                member,
+                message.channel,
+                self._black_formatting,
+                message,
+                message.content,
+                reaction.member,
+                admission=self._format_admission,
+            )
 
         elif (
             reaction.emoji.name in self._delete_emojis_set
@@ -294,6 +475,52 @@ class CodeRunner(Cog):
         ):
             await message.delete()
 
+    async def _admitted(
+        self,
+        member: nextcord.Member,
+        channel: nextcord.TextChannel,
+        job: Callable[..., Awaitable[Any]],
+        *args,
+        admission: Optional[AdmissionController] = None,
+    ) -> Optional[Any]:
+        """Runs a code execution job once the admission controller lets it start, the code runner's controller unless
+        another is given. The user is told their position if the job has to wait and why if it's turned away, in which
+        case None is returned."""
+        admission = admission or self._admission
+        queued_message = None
+
+        async def on_queued(position: int):
+            nonlocal queued_message
+            queued_message = await channel.send(
+                embed=nextcord.Embed(
+                    title="⏳ Queued",
+                    description=f"{member.mention} your code is number {position} in the queue, it'll run shortly.",
+                    color=BLUE,
+                )
+            )
+
+        try:
+            ticket = await admission.acquire(member.id, on_queued)
+        except (Throttled, QueueFull) as exc:
+            description = exc.args[0]
+            if isinstance(exc, Throttled):
+                description += f", try again in {exc.retry_after:.0f} seconds"
+            await channel.send(
+                embed=nextcord.Embed(
+                    title="Slow Down",
+                    description=f"{member.mention} {description}.",
+                    color=ORANGE,
+                )
+            )
+            return None
+
+        try:
+            if queued_message:
+                await queued_message.delete()
+            return await job(*args)
+        finally:
+            admission.release(ticket)
+
     async def _exec(
         self,
         message: nextcord.Message,
@@ -367,25 +594,12 @@ class CodeRunner(Cog):
         elif not out:
             output = ["*No output or exceptions*"]
 
+        # The runner only sends back the start & end of long outputs so they're already short enough to display
         out = "\n\n".join(output)
-        old_out = out
-        if out.count("\n") > 30:
-            lines = out.split("\n")
-            out = "\n".join(
-                lines[:15]
-                + [f".\n.\nRemoved {len(lines) - 30:,} lines\n.\n."]
-                + lines[-17:]
-            )
-        if len(out) > 1000:
-            out = (
-                old_out[:497]
-                + f"\n.\n.\nRemoved {len(old_out) - 1000:,} characters\n.\n.\n"
-                + old_out[-504:]
-            )
         embed = nextcord.Embed(
             title=title, description=f"```\n{out}\n```", color=color
         ).set_footer(text=f"!exec modules | Completed in {duration:0.4f} milliseconds")
-        if "https://xkcd.com/353/" in old_out:
+        if "https://xkcd.com/353/" in out:
             embed.set_image(url="https://imgs.xkcd.com/comics/python.png")
         msg = await message.channel.send(
             content="" if member is None else member.mention,
@@ -408,10 +622,22 @@ class CodeRunner(Cog):
             r"^.*?```(?:bf|brainfuck)?\s*(.+?)\s*```\s*(.+)?$", content, re.DOTALL
         ).groups()
 
-        interpreter = BrainfuckInterpreter(
-            code, user_input + "\n" if user_input else ""
-        )
-        out, err = interpreter.run()
+        key = self._results.key("brainfuck", code, user_input)
+        if not (result := self._results.get(key)):
+            try:
+                result = await self._cpu_pool.run(
+                    "beginner.brainfuck_runner:run_brainfuck",
+                    code,
+                    user_input + "\n" if user_input else "",
+                )
+                if not result[1]:
+                    self._results.set(key, result)
+            except RunnerQueueFull:
+                result = "", "Too many scripts are waiting to run, try again shortly"
+            except (RunnerTimedOut, RunnerCrashed):
+                result = "", "Code took too long to run"
+
+        out, err = result
 
         output = [out]
         if err:
@@ -449,23 +675,28 @@ class CodeRunner(Cog):
                 r"^.*?```(?:py|python)?\s*(.+?)\s*```\s*$", content, re.DOTALL
             ).group(1)
 
-        title = "✅ Formatting - Success"
-        color = BLUE
-        err = None
-
-        try:
-            formatted_code = f"py\n{black.format_file_contents(code, mode=black.FileMode(), fast=True)}\n"
-        except black.NothingChanged:
-            title = "✅ Formatting - Nothing Changed"
-            color = BLUE
-            formatted_code = "Code already formatted correctly."
-            err = False
-        except black.InvalidInput as e:
-            title = "❌ Formatting - Invalid Input"
-            color = YELLOW
-            formatted_code = f"\n{e}\n"
-            err = True
+        key = self._results.key("format", code)
+        if not (result := self._results.get(key)):
+            try:
+                result = await self._format_code(code)
+                if not result[3]:
+                    self._results.set(key, result)
+            except RunnerQueueFull:
+                result = (
+                    "❌ Formatting - Busy",
+                    YELLOW,
+                    "\nToo many requests are waiting to be formatted, try again shortly\n",
+                    True,
+                )
+            except (RunnerTimedOut, RunnerCrashed):
+                result = (
+                    "❌ Formatting - Invalid Input",
+                    YELLOW,
+                    "\nThe code took too long to format\n",
+                    True,
+                )
 
+        title, color, formatted_code, err = result
         msg = await message.channel.send(
             content="" if member is None else member.mention,
             embed=nextcord.Embed(
@@ -480,28 +711,61 @@ class CodeRunner(Cog):
         if err:
             await msg.add_reaction(self._delete_emojis[0])
 
+    async def _format_code(self, code: str) -> Tuple[str, int, str, bool]:
+        status, formatted = await self._cpu_pool.run(
+            "beginner.runner_format:format_code", code
+        )
+        if status == "unchanged":
+            return (
+                "✅ Formatting - Nothing Changed",
+                BLUE,
+                "Code already formatted correctly.",
+                False,
+            )
+
+        if status == "invalid":
+            return "❌ Formatting - Invalid Input", YELLOW, f"\n{formatted}\n", True
+
+        return "✅ Formatting - Success", BLUE, f"py\n{formatted}\n", False
+
     async def code_runner(
         self, mode: str, code: str, user_input: str = "", restricted=True
     ) -> Tuple[str, str, float]:
-        proc = await asyncio.create_subprocess_shell(
-            f"python -m beginner.runner {mode}",
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        data = json.dumps(
-            {
-                "code": code.replace(" ", " "),
-                "input": user_input,
-                "restricted": restricted,
-            }
-        ).encode()
+        data = {
+            "code": code.replace(" ", " "),
+            "input": user_input,
+            "restricted": restricted,
+        }
+        key = self._results.key(mode, code, user_input, restricted)
+        if cached := self._results.get(key):
+            out, stderr = cached
+            return out, stderr, 0
+
         self.logger.debug(f"Running code:\n{code}")
-        stdout, stderr = await proc.communicate(data)
-        out, duration = self._split_run_time(stdout.decode())
+        try:
+            envelope = await self._runner_pool.run(
+                "beginner.runner:run_pooled_job", mode, data
+            )
+        except RunnerQueueFull:
+            return (
+                "",
+                "Beginnerpy.RunnerBusy: Too many scripts are waiting to run, try again shortly",
+                0,
+            )
+        except RunnerTimedOut:
+            return "", "Beginnerpy.ScriptTimedOut: Script took too long to complete", 0
+        except RunnerCrashed:
+            return "", "Beginnerpy.RunnerError: The code runner exited unexpectedly", 0
+
+        self._telemetry.record(mode, envelope)
+        out, stderr = envelope["stdout"], envelope["exception"]
+        duration = envelope["wall_time"] * 1000
 
         self.logger.debug(f"Done {duration}\n{out}\n{stderr}\n{duration}")
-        return out, stderr.decode(), duration
+        if not stderr:
+            # Only the output is cached, the run time belongs to this run
+            self._results.set(key, (out, stderr))
+        return out, stderr, duration
 
     @Cog.command()
     async def eval(self, ctx, *, content):
@@ -536,7 +800,13 @@ class CodeRunner(Cog):
 
         code_message = f"\n```py\n>>> {code}"
 
-        out, err, duration = await self.code_runner("eval", code)
+        result = await self._admitted(
+            ctx.author, ctx.channel, self.code_runner, "eval", code
+        )
+        if not result:
+            return
+
+        out, err, duration = result
 
         output = out
         if err:
@@ -569,7 +839,13 @@ class CodeRunner(Cog):
         code_message = f"{ctx.author.mention} here are the docs you requested"
         code_message += f"\n```py\n{code}```"
 
-        message, exceptions = await self.code_runner("docs", code)
+        result = await self._admitted(
+            ctx.author, ctx.channel, self.code_runner, "docs", code
+        )
+        if not result:
+            return
+
+        message, exceptions, _ = result
 
         if exceptions:
             title = "Code Docs - Unable to retrieve"
@@ -584,14 +860,6 @@ class CodeRunner(Cog):
             mention_author=True,
         )
 
-    def _split_run_time(self, content: str):
-        parts = re.match(r"^(.+?)?\n\^{4}(\d+)\^{4}$", content, re.DOTALL)
-        if parts:
-            parts = parts.groups()
-            if len(parts) == 2 and parts[-1].isdigit():
-                return parts[0] if parts[0] else "", int(parts[1]) / 1000000
-        return content, 0
-
 
 def setup(client):
     client.add_cog(CodeRunner(client))
@@ -1,4 +1,5 @@
 from beginner.cog import Cog
+from beginner.lazy import lazy_import
 import aiohttp
 import nextcord
 import nextcord.ext.commands
@@ -8,7 +9,8 @@ import re
 import random
 import socket
 from datetime import datetime, timedelta
-import pendulum
+
+pendulum = lazy_import("pendulum")
 
 
 def async_cache(coroutine):
@@ -368,13 +370,9 @@ class Fun(Cog):
         finally:
             await ctx.send(response, reference=ctx.message)
 
-    @Cog.listener()
-    async def on_raw_reaction_add(self, reaction):
-        if reaction.emoji.name != "❓":
-            return
-
+    @Cog.reaction("❓")
+    async def on_rickroll_check(self, reaction, message: nextcord.Message):
         channel: nextcord.TextChannel = self.server.get_channel(reaction.channel_id)
-        message: nextcord.Message = await channel.fetch_message(reaction.message_id)
 
         urls = re.findall(
             r"(?:(?:https?|ftp)://)?[\w/\-?=%.]+\.[\w/\-&?=%.]+", message.content
@@ -1,10 +1,12 @@
 from beginner.cog import Cog
-from googleapiclient.discovery import build as google
+from beginner.lazy import lazy_import
 from urllib.parse import quote_plus
 from random import choice
 import beginner.config
 import nextcord
 
+discovery = lazy_import("googleapiclient.discovery")
+
 
 class MoreResultsButton(nextcord.ui.View):
     def __init__(self, url_search):
@@ -30,7 +32,7 @@ class Google(Cog):
                 f"Searching...\n\n[More Results]({url_search})", color
             )
         )
-        query_obj = google(
+        query_obj = discovery.build(
             "customsearch",
             "v1",
             developerKey=google_settings(
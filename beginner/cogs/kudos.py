@@ -1,10 +1,11 @@
 import beginner.kudos as kudos
+from beginner.models import run_db
 import nextcord
 import os
 from beginner.cog import Cog, commands
 from beginner.colors import *
-from datetime import datetime, timedelta
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Optional
 from io import BytesIO
 
 
@@ -12,7 +13,6 @@ class Kudos(Cog):
     def __init__(self, client):
         super().__init__(client)
         self.dev_author = int(os.environ.get("DEV_AUTHOR_ID", 0))
-        self._reactions = {}
 
     @property
     def point_values(self) -> Dict[str, int]:
@@ -30,22 +30,27 @@ class Kudos(Cog):
     def pool_regeneration(self):
         return self.settings.get("kudos.pool.regeneration", 12)
 
-    @property
+    @Cog.resolved
     def reactions(self):
-        if not self._reactions:
-            self._reactions = {
-                "good": self.get_emoji("beginner"),
-                "great": self.get_emoji("intermediate"),
-                "excellent": self.get_emoji("expert"),
-            }
-            self._reactions.update(
-                {emoji.id: name for name, emoji in self.reactions.items()}
-            )
-        return self._reactions
+        reactions = {
+            "good": self.get_emoji("beginner"),
+            "great": self.get_emoji("intermediate"),
+            "excellent": self.get_emoji("expert"),
+        }
+        reactions.update({emoji.id: name for name, emoji in reactions.items()})
+        return reactions
+
+    @Cog.resolved
+    def pool_multiplier_roles(self):
+        return (
+            (self.get_role("jedi council"), 0),  # Infinite kudos
+            (self.get_role("mods"), 4),
+            (self.get_role("staff"), 2),
+        )
 
     @Cog.command()
     async def exportkudos(self, ctx: commands.Context):
-        scores = kudos.get_highest_kudos(100000)
+        scores = await run_db(lambda: list(kudos.get_highest_kudos(100000)))
         file = BytesIO()
         file.writelines(
             f"{member_id},{points}\n".encode() for member_id, points in scores
@@ -112,7 +117,7 @@ class Kudos(Cog):
             )
             return
 
-        author_kudos = kudos.get_user_kudos(ctx.author.id)
+        author_kudos = await run_db(kudos.get_user_kudos, ctx.author.id)
         message = [
             f"{ctx.author.mention} you have {author_kudos if author_kudos > 0 else 'no'} kudos"
         ]
@@ -141,28 +146,39 @@ class Kudos(Cog):
         }:
             leader_board = []
             for index, (member_id, member_kudos) in enumerate(
-                kudos.get_highest_kudos(5)
+                await run_db(lambda: list(kudos.get_highest_kudos(5)))
             ):
                 member = self.server.get_member(member_id)
                 name = member.display_name if member else "*Old Member*"
                 entry = f"{index + 1}. {name} has {member_kudos} kudos"
-                if member.id == ctx.author.id:
+                if member_id == ctx.author.id:
                     entry = f"**{entry}**"
                 leader_board.append(entry)
 
+            rank = await run_db(kudos.get_kudos_rank, ctx.author.id)
+            if rank and rank > len(leader_board):
+                leader_board.append(
+                    f"...\n**{rank}. {ctx.author.display_name} has {author_kudos} kudos**"
+                )
+
             embed.add_field(
                 name="Leader Board", value="\n".join(leader_board), inline=False
             )
         else:
-            points_left = self.points_left_to_give(ctx.author.id)
+            points_left = await run_db(
+                kudos.get_kudos_left,
+                ctx.author.id,
+                self.get_pool_size(ctx.author),
+                self.pool_regeneration,
+            )
             kudos_to_give = f"{points_left} of {self.pool_size}"
             footer += f" | {kudos_to_give} to give"
 
         embed.set_footer(text=footer)
         await ctx.send(embed=embed)
 
-    @Cog.listener()
-    async def on_raw_reaction_add(self, reaction):
+    @Cog.reaction("beginner", "intermediate", "expert")
+    async def on_kudos_added(self, reaction, message: nextcord.Message):
         if not self.settings.get("KUDOS_ENABLED", True):
             return
 
@@ -171,7 +187,6 @@ class Kudos(Cog):
 
         reacter: nextcord.Member = self.server.get_member(reaction.user_id)
         channel: nextcord.TextChannel = self.server.get_channel(reaction.channel_id)
-        message: nextcord.Message = await channel.fetch_message(reaction.message_id)
 
         # Don't allow kudos in channels the user can't message in unless it's the archive
         if not channel.permissions_for(reacter).send_messages and (
@@ -188,39 +203,34 @@ class Kudos(Cog):
             return
 
         level = self.reactions[reaction.emoji.id]
-        kudos_left = self.points_left_to_give(reaction.user_id)
+        pool_size = self.get_pool_size(reacter)
+        regeneration = self.pool_regeneration
+        kudos_left = await run_db(
+            kudos.get_kudos_left, reaction.user_id, pool_size, regeneration
+        )
         kudos_points = self.point_values[level]
 
         if -1 < kudos_left < kudos_points:
-            await channel.send(
-                delete_after=5,
-                embed=nextcord.Embed(
-                    color=RED,
-                    description=f"{reacter.mention} you don't have enough kudos right now",
-                ),
-            )
-            for r in message.reactions:
-                if isinstance(r.emoji, str):
-                    continue
-
-                kudos_level = self.reactions.get(r.emoji.id, False)
-                if kudos_level == level:
-                    await r.remove(reacter)
-                    break
+            await self.reject_kudos(channel, reacter, message, level)
             return
 
         await self.clear_previous_kudos(message, reaction.member, level)
-        kudos.remove_kudos(reaction.message_id, reaction.user_id)
-
-        kudos.give_user_kudos(
-            kudos_points, message.author.id, reaction.user_id, message.id
+        kudos_left = await run_db(
+            kudos.give_kudos_from_pool,
+            kudos_points,
+            message.author.id,
+            reaction.user_id,
+            message.id,
+            pool_size,
+            regeneration,
         )
+        if kudos_left is None:
+            # Another reaction spent the pool after it was checked
+            await self.reject_kudos(channel, reacter, message, level)
+            return
 
-        multiplier = self.get_pool_multiplier(reaction.member)
-        kudos_message = (
-            f"{max(0, kudos_left - kudos_points)} of {self.pool_size * multiplier}"
-        )
-        if multiplier == 0:
+        kudos_message = f"{kudos_left} of {pool_size}"
+        if pool_size is None:
             kudos_message = "∞"
 
         await channel.send(
@@ -236,8 +246,8 @@ class Kudos(Cog):
             allowed_mentions=nextcord.AllowedMentions(replied_user=False),
         )
 
-    @Cog.listener()
-    async def on_raw_reaction_remove(self, reaction):
+    @Cog.reaction("beginner", "intermediate", "expert", event="remove")
+    async def on_kudos_removed(self, reaction, message: nextcord.Message):
         if self.dev_author and reaction.user_id != self.dev_author:
             return
 
@@ -246,7 +256,6 @@ class Kudos(Cog):
 
         reacter: nextcord.Member = self.server.get_member(reaction.user_id)
         channel = self.server.get_channel(reaction.channel_id)
-        message = await channel.fetch_message(reaction.message_id)
 
         if not channel.permissions_for(reacter).send_messages:
             return
@@ -254,7 +263,30 @@ class Kudos(Cog):
         if message.author == reaction.user_id and not self.dev_author:
             return
 
-        kudos.remove_kudos(reaction.message_id, reaction.user_id)
+        await run_db(
+            kudos.refund_kudos,
+            reaction.message_id,
+            reaction.user_id,
+            self.get_pool_size(reacter),
+            self.pool_regeneration,
+        )
+
+    async def reject_kudos(self, channel, reacter, message, level):
+        await channel.send(
+            delete_after=5,
+            embed=nextcord.Embed(
+                color=RED,
+                description=f"{reacter.mention} you don't have enough kudos right now",
+            ),
+        )
+        for r in message.reactions:
+            if isinstance(r.emoji, str):
+                continue
+
+            kudos_level = self.reactions.get(r.emoji.id, False)
+            if kudos_level == level:
+                await r.remove(reacter)
+                break
 
     async def clear_previous_kudos(self, message, user, giving):
         for reaction in message.reactions:
@@ -267,52 +299,19 @@ class Kudos(Cog):
 
             await reaction.remove(user)
 
-    def points_left_to_give(self, user_id: int):
-        member = self.server.get_member(user_id)
-        multiplier = self.get_pool_multiplier(member)
-
+    def get_pool_size(self, member: Optional[nextcord.Member]) -> Optional[int]:
+        """The size of the member's kudos pool including their role multiplier, None if they have infinite kudos. Roles
+        and settings are resolved here on the event loop, the database functions are only passed the numbers."""
+        multiplier = self.get_pool_multiplier(member) if member else 1
         if multiplier == 0:
-            return -1  # Infinite kudos
-
-        pool_size = self.pool_size * multiplier
-
-        since = datetime.utcnow() - timedelta(
-            minutes=self.pool_regeneration * pool_size
-        )
-        kudos_given = kudos.get_kudos_given_since(user_id, since)
-
-        if not kudos_given:
-            return pool_size
-
-        total_points = pool_size
-        last_given = kudos_given[-1][0]
-        for given, points in reversed(kudos_given):
-            # Regenerate points since the last time they were given
-            total_points = min(
-                pool_size,
-                total_points
-                + (given - last_given).seconds // 60 // self.pool_regeneration,
-            )
-            last_given = given
-            # Remove the points given from the pool
-            total_points = max(0, total_points - points)
-
-        # Regenerate all points
-        total_points = min(
-            pool_size,
-            total_points
-            + (datetime.utcnow() - last_given).seconds // 60 // self.pool_regeneration,
-        )
+            return None  # Infinite kudos
 
-        return total_points
+        return self.pool_size * multiplier
 
     def get_pool_multiplier(self, member: nextcord.Member) -> int:
-        if self.get_role("jedi council") in member.roles:
-            return 0  # Infinite kudos
-        elif self.get_role("mods") in member.roles:
-            return 4
-        elif self.get_role("staff") in member.roles:
-            return 2
+        for role, multiplier in self.pool_multiplier_roles:
+            if role in member.roles:
+                return multiplier
         return 1
 
 
@@ -1,10 +1,11 @@
 from beginner.cog import Cog, commands
+from beginner.models import run_db
 from beginner.models.mod_actions import ModAction
 from beginner.scheduler import schedule
 from beginner.snowflake import Snowflake
 from beginner.tags import tag
 from datetime import timedelta, datetime
-from nextcord import Embed, Message, Member, User, utils
+from nextcord import Embed, Message, Member, TextChannel, User, utils
 import nextcord
 import pickle
 import pytz as pytz
@@ -17,8 +18,10 @@ class ModerationCog(Cog):
 
     @Cog.listener()
     async def on_member_join(self, member: Member):
-        history = list(
-            ModAction.select().limit(1).where(ModAction.user_id == member.id)
+        history = await run_db(
+            lambda: list(
+                ModAction.select().limit(1).where(ModAction.user_id == member.id)
+            )
         )
         if history:
             mod_action_log = self.get_channel(
@@ -325,11 +328,13 @@ class ModerationCog(Cog):
     async def history(self, ctx, member: str):
         member_id = int(re.findall(r"\d+", member).pop())
         member: Member = ctx.guild.get_member(member_id) or Snowflake(id=member_id)
-        history = list(
-            ModAction.select()
-            .limit(50)
-            .order_by(ModAction.datetime.desc())
-            .where(ModAction.user_id == member.id)
+        history = await run_db(
+            lambda: list(
+                ModAction.select()
+                .limit(50)
+                .order_by(ModAction.datetime.desc())
+                .where(ModAction.user_id == member.id)
+            )
         )
         message = f"<@{member.id}> has no mod action history."
         title = f"Mod History for {member}"
@@ -416,6 +421,14 @@ class ModerationCog(Cog):
         )
         action.save()
 
+    @property
+    def mod_action_log_name(self) -> str:
+        return self.settings.get("MOD_ACTION_LOG_CHANNEL", "mod-action-log")
+
+    @Cog.resolved(key=lambda self: self.mod_action_log_name)
+    def mod_action_log(self) -> TextChannel:
+        return self.get_channel(self.mod_action_log_name)
+
     async def log_action(
         self,
         action: str,
@@ -428,9 +441,7 @@ class ModerationCog(Cog):
         additional_fields = "\n".join(
             [f"{key}: {value}" for key, value in kwargs.items()]
         )
-        await self.get_channel(
-            self.settings.get("MOD_ACTION_LOG_CHANNEL", "mod-action-log")
-        ).send(
+        await self.mod_action_log.send(
             embed=Embed(
                 description=f"Moderator: {mod.mention}\n"
                 + (
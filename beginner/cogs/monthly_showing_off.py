@@ -1,5 +1,7 @@
 from calendar import c
 from beginner.logging import get_logger
+from beginner.message_cache import message_cache
+from beginner.models import run_db
 from beginner.models.contestants import ContestantInfo
 from nextcord.ext import commands
 from nextcord.ext.commands import Cog, has_permissions
@@ -495,9 +497,9 @@ class MonthlyShowingOffCog(Cog):
             return
 
         # Retrieving required data
-        author_id = self.get_author_id(payload.message_id)
+        author_id = await run_db(self.get_author_id, payload.message_id)
         payload_author_object = self.channel.guild.get_member(payload.user_id)
-        message = await self.channel.fetch_message(payload.message_id)
+        message = await message_cache.fetch(self.channel, payload.message_id)
         has_manage_perms = self.channel.permissions_for(
             payload_author_object
         ).manage_messages
@@ -4,7 +4,6 @@ from beginner.cog import Cog
 from beginner.colors import *
 from nextcord import Embed, TextChannel, Message
 from nextcord.ext import commands
-from functools import cached_property
 from typing import Optional, Set
 import asyncio
 import beginner.config
@@ -60,7 +59,7 @@ class SpamCog(Cog):
         ".mp3",
     }
 
-    @cached_property
+    @Cog.resolved
     def admin_channels(self) -> Set:
         return set(channel.name for channel in self.get_category("Staff").text_channels)
 
@@ -6,28 +6,33 @@ import logging
 class UserRolesCog(Cog):
     def __init__(self, client):
         super().__init__(client)
-        self.channel = None
-        self.reactions_to_roles = {}
+        self.message_id = None
 
-    @Cog.listener()
-    async def on_ready(self):
-        logging.debug("Cog ready")
-        self.channel = self.get_channel("role-assignment")
-        message = await self.get_message()
+    @Cog.resolved
+    def channel(self):
+        return self.get_channel("role-assignment")
 
-        # Load the roles
-        self.reactions_to_roles = {
+    @Cog.resolved
+    def reactions_to_roles(self):
+        return {
             "beginner": self.get_role("beginners"),
             "intermediate": self.get_role("intermediates"),
             "expert": self.get_role("experts"),
         }
 
     @Cog.listener()
-    async def on_raw_reaction_add(self, reaction):
+    async def on_ready(self):
+        logging.debug("Cog ready")
         message = await self.get_message()
-        if reaction.message_id != message.id:
+        self.message_id = message.id
+
+    @Cog.listener()
+    async def on_raw_reaction_add(self, reaction):
+        if reaction.message_id != self.message_id:
             return
 
+        message = await self.fetch_message(self.channel, reaction.message_id)
+
         member = self.server.get_member(reaction.user_id)
         if not member:
             member = await self.server.fetch_member(reaction.user_id)
@@ -50,12 +55,12 @@ class UserRolesCog(Cog):
 
     @Cog.listener()
     async def on_raw_reaction_remove(self, reaction):
-        member = self.server.get_member(reaction.user_id)
-        message = await self.get_message()
-        if member.bot:
+        if reaction.message_id != self.message_id:
             return
 
-        if reaction.message_id != message.id:
+        member = self.server.get_member(reaction.user_id)
+        message = await self.fetch_message(self.channel, reaction.message_id)
+        if member.bot:
             return
 
         if reaction.emoji.name not in self.reactions_to_roles:
@@ -105,9 +110,9 @@ class UserRolesCog(Cog):
         return message
 
     async def remove_reactions(self, keep_reaction, member):
+        message = await self.fetch_message(self.channel, self.message_id)
         for emoji in self.reactions_to_roles:
             if emoji != keep_reaction:
-                message = await self.get_message()
                 await message.remove_reaction(self.get_emoji(emoji), member)
 
 
@@ -1,9 +1,30 @@
+from __future__ import annotations
+from beginner.exceptions import BeginnerException
+import asyncio
 import beginner.logging
-import functools
+import inspect
 import os
 import pathlib
 import yaml
-from typing import Any, Dict, Optional, Sequence, Protocol
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    ItemsView,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Protocol,
+)
+
+
+DEFAULT_FILENAMES = ("production", "development")
 
 
 class ScopedGetter:
@@ -13,12 +34,214 @@ class ScopedGetter:
         ...
 
 
-@functools.lru_cache()
+class ConfigSnapshot:
+    """The settings from a sequence of config files merged into a single immutable view, files later in the sequence
+    override earlier files. Each setting is stored under its (scope, name) pair and each scope has a precomputed view,
+    so lookups don't have to search through the files."""
+
+    _empty_scope: Mapping[str, Any] = MappingProxyType({})
+
+    def __init__(self, configs: Iterable[Dict[str, Any]]):
+        scopes: Dict[str, Dict[str, Any]] = {}
+        for config in configs:
+            for scope, settings in (config or {}).items():
+                scopes.setdefault(scope, {}).update(settings or {})
+
+        self._settings: Mapping[Tuple[str, str], Any] = MappingProxyType(
+            {
+                (scope, name): value
+                for scope, settings in scopes.items()
+                for name, value in settings.items()
+            }
+        )
+        self._scopes: Mapping[str, Mapping[str, Any]] = MappingProxyType(
+            {scope: MappingProxyType(settings) for scope, settings in scopes.items()}
+        )
+
+    def get(self, scope: str, name: str, default: Any = None) -> Any:
+        return self._settings.get((scope, name), default)
+
+    def scope(self, scope: str) -> Mapping[str, Any]:
+        return self._scopes.get(scope, self._empty_scope)
+
+    def changed_scopes(self, other: ConfigSnapshot) -> Set[str]:
+        return {
+            scope
+            for scope in self._scopes.keys() | other._scopes.keys()
+            if self.scope(scope) != other.scope(scope)
+        }
+
+
+class ConfigWatcher:
+    """Polls the modification times of the config files that have been loaded. When one changes every loaded file is
+    parsed again in a worker thread, if they're all valid the snapshots are swapped in on the event loop and the
+    subscribers are called with the scopes that changed. Invalid files are logged and the current config is kept until the files change again."""
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self._task is None:
+            self._mtimes = self._stat()
+            self._task = loop.create_task(self._watch())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def check(self) -> FrozenSet[str]:
+        """Reloads the config if a file has changed since the last check, returns the scopes that changed."""
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return frozenset()
+
+        self._mtimes = mtimes
+        logger = beginner.logging.get_logger()
+        try:
+            configs, snapshots = await asyncio.get_running_loop().run_in_executor(
+                None, _build, list(_configs), list(_snapshots)
+            )
+        except (ConfigError, OSError, yaml.YAMLError) as exc:
+            logger.error(f"Config files changed but couldn't be reloaded: {exc}")
+            return frozenset()
+
+        scopes = _swap(configs, snapshots)
+
+        logger.info(f"Reloaded config, changed scopes: {', '.join(sorted(scopes))}")
+        if scopes:
+            await _notify(scopes)
+        return scopes
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    def _stat(self) -> Dict[str, Optional[float]]:
+        mtimes = {}
+        for filename in list(_configs):
+            try:
+                mtimes[filename] = _config_path(filename).stat().st_mtime_ns
+            except FileNotFoundError:
+                mtimes[filename] = None
+        return mtimes
+
+
+class ConfigError(BeginnerException):
+    pass
+
+
+_configs: Dict[str, Dict[str, Any]] = {}
+_snapshots: Dict[Tuple[str, ...], ConfigSnapshot] = {}
+_subscribers: List[Callable[[FrozenSet[str]], Any]] = []
+
+
 def get_config(filename: str) -> Dict[str, Any]:
-    logger = beginner.logging.get_logger()
+    if filename not in _configs:
+        _configs[filename] = _load_config(filename)
+    return _configs[filename]
 
-    project = pathlib.Path(__file__).parent.parent
-    file_path = project / f"{filename}.yaml"
+
+def get_snapshot(filenames: Sequence[str] = DEFAULT_FILENAMES) -> ConfigSnapshot:
+    filenames = tuple(filenames)
+    snapshot = _snapshots.get(filenames)
+    if snapshot is None:
+        snapshot = ConfigSnapshot(get_config(filename) for filename in filenames)
+        _snapshots[filenames] = snapshot
+    return snapshot
+
+
+def reload() -> FrozenSet[str]:
+    """Parses every config file that has been loaded again and rebuilds the snapshots from them. The new configs and
+    snapshots are swapped in once they are all built & validated, readers never see a partially rebuilt config.
+    Returns the scopes that changed, raises ConfigError if a file isn't a valid config."""
+    return _swap(*_build(list(_configs), list(_snapshots)))
+
+
+def subscribe(
+    callback: Callable[[FrozenSet[str]], Any]
+) -> Callable[[FrozenSet[str]], Any]:
+    """Registers a callback that is passed the scopes that changed whenever the config is reloaded by the watcher. The
+    callback can be a coroutine function."""
+    _subscribers.append(callback)
+    return callback
+
+
+def unsubscribe(callback: Callable[[FrozenSet[str]], Any]):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+async def _notify(scopes: FrozenSet[str]):
+    for callback in list(_subscribers):
+        try:
+            result = callback(scopes)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            beginner.logging.get_logger().exception(
+                f"Config subscriber {callback!r} failed"
+            )
+
+
+def _build(
+    filenames: Sequence[str], snapshot_keys: Sequence[Tuple[str, ...]]
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[str, ...], ConfigSnapshot]]:
+    """Parses the config files and builds new snapshots from them without touching the current config, so it's safe
+    to run in a worker thread. Raises ConfigError if a file isn't a valid config."""
+    configs = {filename: _load_config(filename) for filename in filenames}
+    for filename, config in configs.items():
+        _validate(filename, config)
+
+    snapshots = {
+        keys: ConfigSnapshot(configs[filename] for filename in keys)
+        for keys in snapshot_keys
+        if all(filename in configs for filename in keys)
+    }
+    return configs, snapshots
+
+
+def _swap(
+    configs: Dict[str, Dict[str, Any]],
+    snapshots: Dict[Tuple[str, ...], ConfigSnapshot],
+) -> FrozenSet[str]:
+    """Swaps in configs & snapshots built by _build, returns the scopes that changed. Must be called from the thread
+    that reads the config, the event loop, so nothing is added to the old dicts while they're being replaced. Files &
+    snapshots that were first loaded while the new ones were being built are kept."""
+    global _configs, _snapshots
+    old_snapshots = _snapshots
+    configs = {**_configs, **configs}
+    snapshots = {**old_snapshots, **snapshots}
+    changed = set()
+    for keys, snapshot in snapshots.items():
+        changed.update(snapshot.changed_scopes(old_snapshots[keys]))
+
+    _configs, _snapshots = configs, snapshots
+    return frozenset(changed)
+
+
+def _validate(filename: str, config: Any):
+    if config is None:
+        return
+
+    if not isinstance(config, dict):
+        raise ConfigError(f"{filename}.yaml must be a mapping of scopes")
+
+    for scope, settings in config.items():
+        if settings is not None and not isinstance(settings, dict):
+            raise ConfigError(f"Scope {scope!r} in {filename}.yaml must be a mapping")
+
+
+def _config_path(filename: str) -> pathlib.Path:
+    return pathlib.Path(__file__).parent.parent / f"{filename}.yaml"
+
+
+def _load_config(filename: str) -> Dict[str, Any]:
+    logger = beginner.logging.get_logger()
+    file_path = _config_path(filename)
 
     logger.debug(f"Loading config file: {file_path.resolve()}")
     if not file_path.exists():
@@ -45,17 +268,14 @@ def scope_getter(scope: str, filenames: Optional[Sequence[str]] = None) -> Scope
 def get_setting(
     name: str,
     *,
-    filenames: Sequence[str] = ("production", "development"),
+    filenames: Sequence[str] = DEFAULT_FILENAMES,
     scope: str = "env",
     env_name: Optional[str] = None,
     default: Any = None,
 ) -> Any:
-    """ Searches through yaml config files and the environment for a setting. """
+    """ Looks up a setting in the merged yaml config files, falling back to the environment. """
     not_set = object()
-    value = not_set
-    for file in (get_config(filename) for filename in filenames):
-        value = file.get(scope, {}).get(name, value)
-
+    value = get_snapshot(filenames).get(scope, name, not_set)
     if value is not_set and (env_name is not None or scope == "env"):
         value = os.getenv(env_name if env_name else name, not_set)
 
@@ -63,14 +283,9 @@ def get_setting(
 
 
 def get_scope(
-    scope: str, *, filenames: Sequence[str] = ("production", "development")
-) -> Any:
-    keys = set()
-    for file in (get_config(filename) for filename in filenames):
-        keys.update(file.get(scope, {}).keys())
-
-    for key in keys:
-        value = None
-        for file in (get_config(filename) for filename in filenames):
-            value = file.get(scope, {}).get(key, value)
-        yield key, value
+    scope: str, *, filenames: Sequence[str] = DEFAULT_FILENAMES
+) -> ItemsView[str, Any]:
+    return get_snapshot(filenames).scope(scope).items()
+
+
+watcher = ConfigWatcher()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from nextcord import Guild
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+# The guild attribute each kind of entity is listed in
+KINDS = {
+    "categories": "categories",
+    "channels": "channels",
+    "emojis": "emojis",
+    "roles": "roles",
+}
+
+
+class NameIndex:
+    """Maps the names of a guild's entities of one kind to the entities. When several entities share a name the first
+    one in the guild's list wins, matching a linear search of the list."""
+
+    def __init__(self, entities: Iterable[Any]):
+        self.exact: Dict[str, Any] = {}
+        self.folded: Dict[str, Any] = {}
+        for entity in entities:
+            self.exact.setdefault(entity.name, entity)
+            self.folded.setdefault(entity.name.casefold(), entity)
+
+    def get(self, name: str, preserve_case: bool = True) -> Optional[Any]:
+        if preserve_case:
+            return self.exact.get(name)
+        return self.folded.get(name.casefold())
+
+
+class GuildIndex:
+    """Name indexes of the channels, categories, roles, and emojis of the guilds the bot is in, shared by all cogs. An
+    index is built the first time it's used and is dropped whenever an entity of its kind is created, updated, or
+    deleted, so the next lookup rebuilds it. Indexes built from a guild object that has since been replaced, which
+    happens when the bot reconnects, are rebuilt as well."""
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[int, str], Tuple[Guild, NameIndex]] = {}
+
+    def get(
+        self, guild: Guild, kind: str, name: str, preserve_case: bool = True
+    ) -> Optional[Any]:
+        key = (guild.id, kind)
+        indexed_guild, index = self._indexes.get(key, (None, None))
+        if indexed_guild is not guild:
+            index = NameIndex(getattr(guild, KINDS[kind]))
+            self._indexes[key] = (guild, index)
+
+        return index.get(name, preserve_case)
+
+    def invalidate(self, guild_id: int, *kinds: str):
+        """Drops the indexes of the given kinds for the guild, all of its indexes if no kinds are given."""
+        for kind in kinds or KINDS:
+            self._indexes.pop((guild_id, kind), None)
+
+
+guild_index = GuildIndex()
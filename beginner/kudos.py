@@ -1,49 +1,137 @@
+from beginner.models.kudos_pool import KudosPool
+from beginner.models.kudos_total import KudosTotal
 from beginner.models.points import Points
-from datetime import datetime
-from typing import List, Tuple
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 import peewee
 
 
+# Set once the kudos totals table is known to have been built from the points table
+_totals_built = False
+
+
 def give_user_kudos(kudos: int, user_id: int, giver_id: int, message_id: int):
-    kudos = Points(
-        awarded=datetime.utcnow(),
-        user_id=user_id,
-        giver_id=giver_id,
-        message_id=message_id,
-        points=kudos,
-        point_type="KUDOS",
-    )
-    kudos.save()
+    _build_kudos_totals()
+    with Points._meta.database.atomic():
+        kudos = Points(
+            awarded=datetime.utcnow(),
+            user_id=user_id,
+            giver_id=giver_id,
+            message_id=message_id,
+            points=kudos,
+            point_type="KUDOS",
+        )
+        kudos.save()
+        _update_kudos_total(user_id, kudos.points)
 
 
 def get_user_kudos(user_id) -> int:
+    _build_kudos_totals()
     kudos = (
-        Points.select(peewee.fn.SUM(Points.points))
-        .where(Points.user_id == user_id, Points.point_type == "KUDOS")
+        KudosTotal.select(KudosTotal.points)
+        .where(KudosTotal.user_id == user_id)
         .scalar()
     )
     return 0 if kudos is None else kudos
 
 
 def get_highest_kudos(num_users: int = -1) -> List[Tuple[int, int]]:
+    _build_kudos_totals()
     query = (
-        Points.select(Points.user_id, peewee.fn.SUM(Points.points))
-        .group_by(Points.user_id)
-        .order_by(peewee.fn.SUM(Points.points).desc())
-        .where(Points.point_type == "KUDOS")
+        KudosTotal.select(KudosTotal.user_id, KudosTotal.points)
+        .where(KudosTotal.points != 0)
+        .order_by(KudosTotal.points.desc())
     )
     if num_users > 0:
-        query.limit(num_users)
+        query = query.limit(num_users)
 
     return query.tuples()
 
 
-def remove_kudos(message_id: int, giver_id: int):
-    Points.delete().where(
-        Points.message_id == message_id,
-        Points.giver_id == giver_id,
-        Points.point_type == "KUDOS",
-    ).execute()
+def get_kudos_rank(user_id: int) -> Optional[int]:
+    """Gets the user's position on the kudos leaderboard, None if they have no kudos."""
+    kudos = get_user_kudos(user_id)
+    if not kudos:
+        return None
+
+    return KudosTotal.select().where(KudosTotal.points > kudos).count() + 1
+
+
+def remove_kudos(message_id: int, giver_id: int) -> List[Tuple[datetime, int]]:
+    """Removes the kudos a giver gave to a message, returning the awarded date & points of what was removed. Only the
+    rows this call actually deleted are taken off the totals, so concurrent removals can't both decrement them."""
+    _build_kudos_totals()
+    with Points._meta.database.atomic():
+        query = (
+            Points.delete()
+            .where(
+                Points.message_id == message_id,
+                Points.giver_id == giver_id,
+                Points.point_type == "KUDOS",
+            )
+            .returning(Points.user_id, Points.awarded, Points.points)
+        )
+        removed = list(query.tuples().execute())
+        for user_id, _, points in removed:
+            _update_kudos_total(user_id, -points)
+
+    return [(awarded, points) for _, awarded, points in removed]
+
+
+def get_kudos_left(giver_id: int, pool_size: Optional[int], regeneration: int) -> int:
+    """Gets how many kudos the giver has left in their pool, -1 if they have infinite kudos (no pool size). The pool
+    size includes the giver's multiplier and regeneration is the number of minutes it takes to regenerate a point."""
+    if pool_size is None:
+        return -1
+
+    with KudosPool._meta.database.atomic():
+        balance, _ = _regenerate_pool(giver_id, pool_size, regeneration)
+        return balance
+
+
+def give_kudos_from_pool(
+    kudos: int,
+    user_id: int,
+    giver_id: int,
+    message_id: int,
+    pool_size: Optional[int],
+    regeneration: int,
+) -> Optional[int]:
+    """Replaces any kudos the giver already gave the message and takes the points from their pool. Returns how many
+    kudos the giver has left, -1 if they have infinite kudos, or None if they don't have enough and nothing was
+    changed."""
+    with Points._meta.database.atomic() as transaction:
+        if pool_size is None:
+            remove_kudos(message_id, giver_id)
+            give_user_kudos(kudos, user_id, giver_id, message_id)
+            return -1
+
+        # Seed a new pool from the giver's history before it changes, otherwise the replaced & new kudos would be
+        # counted by the replay as well as refunded or taken below
+        _regenerate_pool(giver_id, pool_size, regeneration)
+        removed = remove_kudos(message_id, giver_id)
+        balance = _refund_pool(giver_id, removed, pool_size, regeneration)
+        if not _take_from_pool(giver_id, kudos):
+            transaction.rollback()
+            return None
+
+        give_user_kudos(kudos, user_id, giver_id, message_id)
+        return balance - kudos
+
+
+def refund_kudos(
+    message_id: int, giver_id: int, pool_size: Optional[int], regeneration: int
+):
+    """Removes the kudos a giver gave to a message and refunds the recently given points to their pool."""
+    with Points._meta.database.atomic():
+        if pool_size is None:
+            remove_kudos(message_id, giver_id)
+            return
+
+        _regenerate_pool(giver_id, pool_size, regeneration)  # Seed before the history changes
+        removed = remove_kudos(message_id, giver_id)
+        if removed:
+            _refund_pool(giver_id, removed, pool_size, regeneration)
 
 
 def get_kudos_given_since(giver_id: int, since: datetime):
@@ -58,3 +146,126 @@ def get_kudos_given_since(giver_id: int, since: datetime):
         .tuples()
     )
     return [(point[0], point[1]) for point in points]
+
+
+def _refund_pool(
+    giver_id: int,
+    removed: List[Tuple[datetime, int]],
+    pool_size: int,
+    regeneration: int,
+) -> int:
+    """Brings the giver's pool up to date and refunds the removed kudos that were given recently enough that they'd
+    still be regenerating. Returns the new balance, must be run in a transaction."""
+    balance, updated = _regenerate_pool(giver_id, pool_size, regeneration)
+    since = datetime.utcnow() - timedelta(minutes=regeneration * pool_size)
+    refund = sum(points for awarded, points in removed if awarded >= since)
+    if refund and balance < pool_size:
+        balance = min(pool_size, balance + refund)
+        _set_pool(giver_id, balance, updated)
+
+    return balance
+
+
+def _take_from_pool(giver_id: int, kudos: int) -> bool:
+    """Takes the points from the giver's pool if it has enough, the check and decrement are a single statement so
+    concurrent gifts can't overdraw the pool."""
+    query = KudosPool.update(balance=KudosPool.balance - kudos).where(
+        KudosPool.giver_id == giver_id, KudosPool.balance >= kudos
+    )
+    return query.execute() > 0
+
+
+def _regenerate_pool(
+    giver_id: int, pool_size: int, regeneration: int
+) -> Tuple[int, datetime]:
+    """Locks the giver's pool row and regenerates its balance, creating it from the kudos they've given if they don't
+    have one yet. Returns the balance and the time regeneration has been accounted for up to, must be run in a
+    transaction."""
+    now = datetime.utcnow()
+    pool = _lock_pool(giver_id)
+    if pool is None:
+        balance = _replay_kudos_given(giver_id, pool_size, regeneration)
+        KudosPool.insert(
+            giver_id=giver_id, balance=balance, updated=now
+        ).on_conflict_ignore().execute()
+        # Another thread may have created the row first, so use whatever was stored
+        pool = _lock_pool(giver_id)
+
+    interval = timedelta(minutes=regeneration)
+    regenerated = (now - pool.updated) // interval
+    balance, updated = pool.balance + regenerated, pool.updated + regenerated * interval
+    if balance >= pool_size:
+        balance, updated = pool_size, now
+
+    if (balance, updated) != (pool.balance, pool.updated):
+        _set_pool(giver_id, balance, updated)
+
+    return balance, updated
+
+
+def _lock_pool(giver_id: int) -> Optional[KudosPool]:
+    query = KudosPool.select().where(KudosPool.giver_id == giver_id)
+    if KudosPool._meta.database.for_update:
+        query = query.for_update()
+
+    return query.get_or_none()
+
+
+def _set_pool(giver_id: int, balance: int, updated: datetime):
+    KudosPool.update(balance=balance, updated=updated).where(
+        KudosPool.giver_id == giver_id
+    ).execute()
+
+
+def _replay_kudos_given(giver_id: int, pool_size: int, regeneration: int) -> int:
+    """Calculates a giver's pool balance from the kudos they've given. Only used for givers that don't have a pool
+    yet, after that the pool is updated as kudos are given & removed."""
+    since = datetime.utcnow() - timedelta(minutes=regeneration * pool_size)
+    kudos_given = get_kudos_given_since(giver_id, since)
+
+    if not kudos_given:
+        return pool_size
+
+    total_points = pool_size
+    last_given = kudos_given[-1][0]
+    for given, points in reversed(kudos_given):
+        # Regenerate points since the last time they were given
+        total_points = min(
+            pool_size,
+            total_points + (given - last_given).seconds // 60 // regeneration,
+        )
+        last_given = given
+        # Remove the points given from the pool
+        total_points = max(0, total_points - points)
+
+    # Regenerate all points
+    total_points = min(
+        pool_size,
+        total_points + (datetime.utcnow() - last_given).seconds // 60 // regeneration,
+    )
+
+    return total_points
+
+
+def _update_kudos_total(user_id: int, points: int):
+    KudosTotal.insert(user_id=user_id, points=points).on_conflict(
+        conflict_target=[KudosTotal.user_id],
+        update={KudosTotal.points: KudosTotal.points + points},
+    ).execute()
+
+
+def _build_kudos_totals():
+    """Builds the kudos totals table from the points table if it hasn't been built yet."""
+    global _totals_built
+    if _totals_built:
+        return
+
+    if not KudosTotal.select().exists():
+        KudosTotal.insert_from(
+            Points.select(Points.user_id, peewee.fn.SUM(Points.points))
+            .where(Points.point_type == "KUDOS")
+            .group_by(Points.user_id),
+            fields=[KudosTotal.user_id, KudosTotal.points],
+        ).execute()
+
+    _totals_built = True
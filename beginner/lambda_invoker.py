@@ -0,0 +1,91 @@
+from __future__ import annotations
+from beginner.logging import get_logger
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+import asyncio
+import io
+import json
+import subprocess
+import sys
+
+
+class LambdaInvoker:
+    """Invokes AWS Lambda functions without blocking the event loop. The boto3 client is synchronous so invocations
+    are run on a dedicated, bounded thread pool. Invocations beyond the concurrency limit wait their turn and every
+    invocation is given a timeout."""
+
+    def __init__(self, client: Any, max_concurrency: int = 5, timeout: float = 30.0):
+        self._client = client
+        self._max_concurrency = max_concurrency
+        self._timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="lambda-invoker"
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._logger = get_logger(("beginner.py", "LambdaInvoker"))
+
+    async def invoke(
+        self, function_name: str, payload: Dict[str, Any], timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Invokes the function with the payload and returns the decoded JSON response payload."""
+        if not self._slots:
+            self._slots = asyncio.Semaphore(self._max_concurrency)
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(
+                loop.run_in_executor(
+                    self._executor, self._invoke, function_name, json.dumps(payload)
+                ),
+                timeout or self._timeout,
+            )
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _invoke(self, function_name: str, payload: str) -> Dict[str, Any]:
+        response = self._client.invoke(FunctionName=function_name, Payload=payload)
+        return json.loads(response["Payload"].read().decode())
+
+
+class LocalLambdaClient:
+    """Stand-in for the boto3 Lambda client that runs the code runner function locally using the legacy runner. Used
+    for development & testing when there are no AWS credentials."""
+
+    def __init__(self, timeout: float = 10.0):
+        self._timeout = timeout
+        self._logger = get_logger(("beginner.py", "LocalLambdaClient"))
+
+    def invoke(self, FunctionName: str, Payload: str) -> Dict[str, Any]:
+        self._logger.debug(f"Locally invoking {FunctionName}")
+        request = json.loads(Payload)
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-m", "beginner.runner", "exec"],
+                input=json.dumps(
+                    {"code": request["code"], "input": request.get("stdin") or ""}
+                ).encode(),
+                capture_output=True,
+                timeout=self._timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return self._response(
+                {"errorMessage": f"Task timed out after {self._timeout:.2f} seconds"}
+            )
+
+        try:
+            envelope = json.loads(proc.stdout.decode())
+        except ValueError:
+            return self._response(
+                {"errorMessage": proc.stderr.decode().strip() or "Runner failed"}
+            )
+
+        exception = None
+        if error := envelope["exception"].strip():
+            type_, _, message = error.rpartition("\n")[-1].partition(": ")
+            exception = {"type": type_, "args": [message]}
+
+        return self._response({"result": envelope["stdout"], "exception": exception})
+
+    def _response(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {"StatusCode": 200, "Payload": io.BytesIO(json.dumps(payload).encode())}
@@ -0,0 +1,50 @@
+from beginner.logging import get_logger
+from beginner.memory import resident_memory
+from types import ModuleType
+from typing import Any, Optional
+import importlib
+import importlib.util
+import time
+
+
+logger = get_logger(("beginner.py", "lazy"))
+
+
+class LazyModule:
+    """Stands in for a module that is slow to import or uses a lot of memory. The module is imported the first time one
+    of its attributes is used, so cogs that rarely need it don't slow down startup or grow the bot's memory."""
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module: Optional[ModuleType] = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self.__module is None:
+            self.__module = _import(self.__name)
+        return getattr(self.__module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__module else "not loaded"
+        return f"<{type(self).__name__} {self.__name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns a module that is imported on first use. Raises ModuleNotFoundError straight away if the top level
+    package isn't installed, so missing dependencies are still found when the cog is loaded."""
+    package = name.partition(".")[0]
+    if importlib.util.find_spec(package) is None:
+        raise ModuleNotFoundError(f"No module named {package!r}", name=package)
+
+    return LazyModule(name)
+
+
+def _import(name: str) -> ModuleType:
+    memory = resident_memory()
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    seconds = time.perf_counter() - start
+    memory = resident_memory() - memory
+    logger.info(
+        f"Lazily imported {name} in {seconds * 1000:.1f}ms (+{memory // 1024:,} KiB)"
+    )
+    return module
@@ -0,0 +1,11 @@
+import os
+import resource
+
+
+def resident_memory() -> int:
+    """The process's current resident memory in bytes, falls back to the peak where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,46 @@
+from __future__ import annotations
+from collections import OrderedDict
+from nextcord import Message, TextChannel
+from typing import Tuple
+import asyncio
+import time
+
+
+class MessageCache:
+    """Short lived cache of fetched messages. Concurrent requests for the same message share a single fetch so that a
+    reaction event handled by several cogs only costs one API call. Entries expire quickly since fetched messages are
+    not kept up to date by gateway events."""
+
+    def __init__(self, ttl: float = 5.0, max_size: int = 256):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._messages: OrderedDict[int, Tuple[float, asyncio.Future]] = OrderedDict()
+
+    async def fetch(self, channel: TextChannel, message_id: int) -> Message:
+        now = time.monotonic()
+        self._prune(now)
+        if message_id in self._messages:
+            return await asyncio.shield(self._messages[message_id][1])
+
+        future = asyncio.ensure_future(channel.fetch_message(message_id))
+        self._messages[message_id] = (now, future)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            if self._messages.get(message_id, (0, None))[1] is future:
+                del self._messages[message_id]
+            raise
+
+    def invalidate(self, message_id: int):
+        self._messages.pop(message_id, None)
+
+    def _prune(self, now: float):
+        while self._messages:
+            message_id, (created, _) = next(iter(self._messages.items()))
+            if now - created < self._ttl and len(self._messages) < self._max_size:
+                return
+
+            del self._messages[message_id]
+
+
+message_cache = MessageCache()
@@ -1 +1,26 @@
 from ._database import *
+from ._executor import *
+from ._pool import *
+from peewee import *  # Make everything available here to simplify imports
+import importlib
+import pkgutil
+
+
+class Model(Model):
+    """ Base model for beginner.py models. """
+
+    pass
+
+
+def set_database(db: Database, max_workers: int = 4) -> None:
+    """Take a peewee database and bind it to all beginner.py models. Max workers is the number of threads that
+    run_db can use to run queries."""
+    # Import every model so that all tables exist before migrations are run
+    for module in pkgutil.iter_modules(__path__):
+        importlib.import_module(f"{__name__}.{module.name}")
+
+    db.bind(Model.__subclasses__())
+    db.create_tables(Model.__subclasses__())
+    run_migrations(db)
+    set_executor_database(db, max_workers)
+    return
@@ -1,14 +1,81 @@
-from peewee import *  # Make everything available here to simplify imports
+from datetime import datetime
+from playhouse.migrate import SchemaMigrator, migrate
+from typing import Callable, Dict, List, Sequence
+import peewee
+import beginner.logging
 
 
-class Model(Model):
-    """ Base model for beginner.py models. """
+__all__ = ["migration", "run_migrations"]
 
-    pass
 
+# All registered migrations by version number
+__migrations__: Dict[int, Callable[[peewee.Database, SchemaMigrator], None]] = {}
 
-def set_database(db: Database) -> None:
-    """ Take a peewee database and bind it to all beginner.py models. """
-    db.bind(Model.__subclasses__())
-    db.create_tables(Model.__subclasses__())
-    return
+
+class SchemaMigration(peewee.Model):
+    """ Tracks which migrations have been applied to a database. """
+
+    version = peewee.IntegerField(primary_key=True)
+    name = peewee.CharField(max_length=128)
+    applied = peewee.DateTimeField()
+
+
+def migration(version: int) -> Callable:
+    """Decorator that registers a migration. Migrations are run in order of their version and are passed the database
+    and a schema migrator for it. Migrations run after all tables have been created so they only need to alter them."""
+
+    def decorator(func: Callable) -> Callable:
+        if version in __migrations__:
+            raise ValueError(f"Migration {version} is already registered")
+
+        __migrations__[version] = func
+        return func
+
+    return decorator
+
+
+def run_migrations(db: peewee.Database) -> List[int]:
+    """ Applies all migrations that haven't been applied to the database, returns the versions applied. """
+    logger = beginner.logging.get_logger(("beginner.py", "migrations"))
+    db.bind([SchemaMigration])
+    db.create_tables([SchemaMigration])
+
+    applied = {row.version for row in SchemaMigration.select(SchemaMigration.version)}
+    migrator = SchemaMigrator.from_database(db)
+    ran = []
+    for version in sorted(__migrations__.keys() - applied):
+        func = __migrations__[version]
+        logger.info(f"Applying migration {version}: {func.__name__}")
+        with db.atomic():
+            func(db, migrator)
+            SchemaMigration.create(
+                version=version, name=func.__name__, applied=datetime.utcnow()
+            )
+        ran.append(version)
+
+    return ran
+
+
+def add_index(
+    db: peewee.Database,
+    migrator: SchemaMigrator,
+    table: str,
+    columns: Sequence[str],
+    unique: bool = False,
+):
+    """ Adds an index to a table unless there's already an index on the same columns. """
+    if any(index.columns == list(columns) for index in db.get_indexes(table)):
+        return
+
+    migrate(migrator.add_index(table, columns, unique))
+
+
+@migration(1)
+def add_query_indexes(db: peewee.Database, migrator: SchemaMigrator):
+    add_index(db, migrator, "points", ("user_id", "point_type"))
+    add_index(db, migrator, "points", ("giver_id", "point_type", "awarded"))
+    add_index(db, migrator, "points", ("message_id", "giver_id"))
+    add_index(db, migrator, "modaction", ("user_id", "datetime"))
+    add_index(db, migrator, "scheduler", ("name",))
+    add_index(db, migrator, "settings", ("name",))
+    add_index(db, migrator, "contestantinfo", ("bot_message_id",))
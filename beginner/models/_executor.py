@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+import asyncio
+import functools
+import peewee
+
+
+__all__ = ["run_db", "set_executor_database"]
+
+
+T = TypeVar("T")
+
+_database: Optional[peewee.Database] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def set_executor_database(db: peewee.Database, max_workers: int = 4):
+    """ Sets the database that functions run with run_db use and the number of threads they're run on. """
+    global _database, _executor
+    if _executor:
+        _executor.shutdown(wait=False)
+
+    _database = db
+    _executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="database"
+    )
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """Runs a function that queries the database on the database thread pool so the event loop isn't blocked while
+    waiting on the database. A connection is checked out for the duration of the call."""
+    if not _executor:
+        raise RuntimeError("The database has not been set")
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(_run_with_connection, func, args, kwargs)
+    )
+
+
+def _run_with_connection(func: Callable[..., T], args, kwargs) -> T:
+    with _database.connection_context():
+        return func(*args, **kwargs)
@@ -0,0 +1,111 @@
+from playhouse.pool import PooledPostgresqlDatabase
+from typing import Dict
+import asyncio
+import peewee
+import time
+import beginner.logging
+
+
+__all__ = ["ReconnectingPooledPostgresqlDatabase"]
+
+
+class ReconnectingPooledPostgresqlDatabase(PooledPostgresqlDatabase):
+    """Pooled Postgres database that retries reads that fail because the connection was lost, waiting longer between
+    each attempt. Writes and queries inside of a transaction are never retried, a write may have been applied before
+    the connection dropped and a transaction's earlier changes would be lost, callers that need to retry those should
+    retry the whole transaction. Queries run on the event loop are only retried once, straight away, so the loop isn't
+    blocked waiting to retry. Connections that have been idle in the pool for longer than the health check interval are pinged
+    before they're checked out so dead connections are thrown away rather than handed out."""
+
+    def __init__(
+        self,
+        database: str,
+        *,
+        retries: int = 3,
+        retry_backoff: float = 0.5,
+        health_check_interval: float = 30,
+        **kwargs,
+    ):
+        super().__init__(database, **kwargs)
+        self._retries = retries
+        self._retry_backoff = retry_backoff
+        self._health_check_interval = health_check_interval
+        self._returned: Dict[int, float] = {}
+        self._logger = beginner.logging.get_logger(("beginner.py", "database"))
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return super().execute_sql(sql, params, *args, **kwargs)
+            except (peewee.OperationalError, peewee.InterfaceError) as exc:
+                on_event_loop = _on_event_loop()
+                retries = min(1, self._retries) if on_event_loop else self._retries
+                if self.in_transaction() or not _is_read(sql) or attempt >= retries:
+                    raise
+
+                delay = 0 if on_event_loop else self._retry_backoff * 2**attempt
+                attempt += 1
+                self._logger.warning(
+                    f"Database query failed ({exc}), retrying in {delay:0.1f}s "
+                    f"(attempt {attempt} of {retries})"
+                )
+                self._discard_connection()
+                if delay:
+                    time.sleep(delay)
+
+    def _discard_connection(self):
+        try:
+            self.close()
+        except peewee.PeeweeException:
+            pass
+
+    def _close(self, conn, close_conn=False):
+        with self._pool_lock:
+            super()._close(conn, close_conn)
+            # Only connections that went back into the pool need a health check, forget any that were closed
+            key = self.conn_key(conn)
+            if not close_conn and any(
+                self.conn_key(pooled) == key for _, _, pooled in self._connections
+            ):
+                self._returned[key] = time.time()
+            else:
+                self._returned.pop(key, None)
+
+    def _can_reuse(self, conn):
+        try:
+            return super()._can_reuse(conn)
+        except Exception:
+            return False  # The connection is unusable
+
+    def _is_closed(self, conn):
+        if super()._is_closed(conn):
+            return True
+
+        returned = self._returned.pop(self.conn_key(conn), None)
+        if (
+            self._health_check_interval
+            and returned is not None
+            and time.time() - returned >= self._health_check_interval
+        ):
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            except Exception:
+                self._logger.debug("Discarding a pooled connection that failed its health check")
+                return True
+
+        return False
+
+
+def _is_read(sql: str) -> bool:
+    return sql.lstrip()[:6].upper() == "SELECT"
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return True
@@ -0,0 +1,7 @@
+import beginner.models as models
+
+
+class KudosPool(models.Model):
+    giver_id = models.BigIntegerField(unique=True)
+    balance = models.IntegerField()
+    updated = models.DateTimeField()
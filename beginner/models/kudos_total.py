@@ -0,0 +1,6 @@
+import beginner.models as models
+
+
+class KudosTotal(models.Model):
+    user_id = models.BigIntegerField(unique=True)
+    points = models.IntegerField(index=True)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+import hashlib
+import pathlib
+import time
+
+
+# Modes that are pure transforms of their input, the only results that are cached. Scripts run with exec, eval, and
+# !run can read the time, randomness, or the environment, so they're always run.
+CACHED_MODES = frozenset({"brainfuck", "dis", "docs", "format"})
+
+
+def file_version(paths: Iterable[pathlib.Path]) -> str:
+    """ Hashes the contents of the files that determine what a runner does, used to version cached results. """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """Bounded LRU cache of code runner results keyed on a hash of the mode, code, input, restrictions, and the
+    version of the runner. Only the results of pure transforms are cached, callers shouldn't store errors, timeouts,
+    or timings since those depend on the run rather than the code. Entries expire after the TTL."""
+
+    def __init__(self, ttl: float = 600.0, max_size: int = 512, version: str = ""):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._version = version
+        self._results: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def key(
+        self, mode: str, code: str, stdin: str = "", restricted: bool = True
+    ) -> Optional[str]:
+        """Creates the cache key for a run, returns None if the result of the run can't be cached."""
+        if mode not in CACHED_MODES:
+            return None
+
+        digest = hashlib.sha256()
+        for part in (self._version, mode, code, stdin or "", str(restricted)):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+
+        now = time.monotonic()
+        created, result = self._results.get(key, (0, None))
+        if result is None or now - created >= self._ttl:
+            self._results.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._results.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def set(self, key: Optional[str], result: Any):
+        if key is None:
+            return
+
+        self._results[key] = (time.monotonic(), result)
+        self._results.move_to_end(key)
+        while len(self._results) > self._max_size:
+            self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._results)}
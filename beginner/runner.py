@@ -1,6 +1,4 @@
-import ast
 import contextlib
-import inspect
 import io
 import json
 import pathlib
@@ -12,6 +10,8 @@ import traceback
 import uuid
 import hashlib
 from types import ModuleType
+from beginner.runner_rewrite.buffer import RunnerOutputBuffer
+from beginner.runner_rewrite.scanner import Scanner
 import os
 from collections import UserDict
 
@@ -178,11 +178,7 @@ class Executer:
         raise ScriptTimedOut()
 
     def dunder_attributes(self, code_tree):
-        attributes = set()
-        for node in ast.walk(code_tree):
-            if isinstance(node, ast.Attribute) and node.attr.startswith("__"):
-                attributes.add(node.attr)
-        return attributes
+        return Scanner(code_tree).get_dunder_attributes()
 
     def generate_builtins(self, restricted=True):
         b = __builtins__
@@ -263,7 +259,7 @@ class Executer:
 
     def exec(self, code, runner=exec, restricted=True):
         try:
-            code_tree = ast.parse(code, "<string>", runner.__name__)
+            scanner = Scanner.from_code(code, runner.__name__, "<string>")
         except SyntaxError as excp:
             msg, (file, line_no, column, line) = excp.args
             spaces = " " * (column - 1)
@@ -272,7 +268,7 @@ class Executer:
             )
             exceptions = True
         else:
-            dunder_attributes = self.dunder_attributes(code_tree)
+            dunder_attributes = scanner.get_dunder_attributes()
             if restricted and dunder_attributes - self.dunder_whitelist:
                 prohibited_attributes = ", ".join(
                     sorted(dunder_attributes - self.dunder_whitelist)
@@ -281,7 +277,7 @@ class Executer:
                     f"These attributes are not whitelisted: {prohibited_attributes}"
                 )
 
-            code_object = compile(code_tree, "<string>", runner.__name__)
+            code_object = compile(scanner.tree, "<string>", runner.__name__)
             ns_globals = self.generate_globals(restricted)
             result = runner(code_object, ns_globals, ns_globals)
             if runner == eval and not printed:
@@ -291,11 +287,14 @@ class Executer:
 
     def run(self, code, user_input, runner=exec, docs=False, restricted=True):
         self.stdin = io.StringIO(user_input)
+        self.exit_code = 0
+        self.wall_time = 0.0
+        self.truncated_chars = 0
         exceptions = False
 
         with self.set_recursion_depth(100):
             try:
-                code_tree = ast.parse(code, "<string>", runner.__name__)
+                scanner = Scanner.from_code(code, runner.__name__, "<string>")
             except SyntaxError as excp:
                 msg, (file, line_no, column, line, start, stop) = excp.args
                 spaces = " " * (column - 1)
@@ -304,8 +303,9 @@ class Executer:
                     f"Line {line_no}\n{line.rstrip() if line else ''}\n{spaces}{carets}\nSyntaxError: {msg}"
                 )
                 exceptions = True
+                self.exit_code = 1
             else:
-                dunder_attributes = self.dunder_attributes(code_tree)
+                dunder_attributes = scanner.get_dunder_attributes()
                 if restricted and dunder_attributes - self.dunder_whitelist:
                     prohibited_attributes = ", ".join(
                         sorted(dunder_attributes - self.dunder_whitelist)
@@ -314,9 +314,14 @@ class Executer:
                         f"NameError: These attributes are not whitelisted: {prohibited_attributes}"
                     )
                     exceptions = True
+                    self.exit_code = 1
 
                 if not exceptions:
-                    code_object = compile(code_tree, "<string>", runner.__name__)
+                    code_object = compile(scanner.tree, "<string>", runner.__name__)
+                    real_stdout, real_stderr = sys.stdout, sys.stderr
+                    sys.stdout, sys.stderr = RunnerOutputBuffer(), RunnerOutputBuffer()
+                    start = time.time_ns()
+                    self.exit_code = 1  # Cleared if the code runs without raising
                     try:
                         ns_globals = self.generate_globals(restricted)
                         _, hard = resource.getrlimit(resource.RLIMIT_CPU)
@@ -335,6 +340,7 @@ class Executer:
                                 )
                             elif result is not None:
                                 print(repr(result))
+                        self.exit_code = 0
                     except MemoryError:
                         sys.stderr.write("MemoryError: Exceeded process memory limits")
                     except CPUTimeExceeded:
@@ -353,144 +359,204 @@ class Executer:
                         sys.stderr.write(
                             f"EXIT WITH CODE {0 if se.code is None else se.code}\n"
                         )
+                        self.exit_code = (
+                            se.code
+                            if isinstance(se.code, int)
+                            else int(se.code is not None)
+                        )
                     finally:
-                        print(f"\n^^^^{time.time_ns() - start}^^^^")
+                        self.wall_time = (time.time_ns() - start) / 1_000_000_000
+                        stdout, sys.stdout = sys.stdout, real_stdout
+                        stderr, sys.stderr = sys.stderr, real_stderr
+                        self.truncated_chars = stdout.dropped_chars + stderr.dropped_chars
+                        sys.stdout.write(stdout.getvalue())
+                        sys.stderr.write(stderr.getvalue())
 
     @contextlib.contextmanager
     def set_recursion_depth(self, depth):
         old_depth = sys.getrecursionlimit()
-        sys.setrecursionlimit(depth + len(inspect.stack(0)))
+        frame, stack_depth = sys._getframe(), 0
+        while frame:
+            frame, stack_depth = frame.f_back, stack_depth + 1
+        sys.setrecursionlimit(depth + stack_depth)
         yield
         sys.setrecursionlimit(old_depth)
 
 
-if __name__ == "__main__":
+NAME_WHITELIST = frozenset(
+    {
+        "__import__",
+        "__build_class__",
+        "ArithmeticError",
+        "AssertionError",
+        "AttributeError",
+        "BlockingIOError",
+        "BrokenPipeError",
+        "BufferError",
+        "BytesWarning",
+        "ChildProcessError",
+        "ConnectionAbortedError",
+        "ConnectionError",
+        "ConnectionRefusedError",
+        "ConnectionResetError",
+        "DeprecationWarning",
+        "EOFError",
+        "BaseException",
+        "Exception",
+        "Ellipsis",
+        "False",
+        "GeneratorExit",
+        "KeyboardInterrupt",
+        "None",
+        "NotImplemented",
+        "SystemExit",
+        "True",
+        "abs",
+        "all",
+        "any",
+        "ascii",
+        "bin",
+        "bool",
+        "bytearray",
+        "bytes",
+        "callable",
+        "chr",
+        "classmethod",
+        "complex",
+        "copyright",
+        "credits",
+        "delattr",
+        "dict",
+        "dir",
+        "divmod",
+        "enumerate",
+        "eval",
+        "exec",
+        "exit",
+        "filter",
+        "float",
+        "format",
+        "frozenset",
+        "getattr",
+        "globals",
+        "hasattr",
+        "hash",
+        "hex",
+        "id",
+        "input",
+        "int",
+        "isinstance",
+        "issubclass",
+        "iter",
+        "len",
+        "license",
+        "list",
+        "locals",
+        "map",
+        "max",
+        "min",
+        "NameError",
+        "next",
+        "object",
+        "oct",
+        "ord",
+        "pow",
+        "print",
+        "property",
+        "quit",
+        "range",
+        "repr",
+        "reversed",
+        "round",
+        "set",
+        "setattr",
+        "slice",
+        "sorted",
+        "staticmethod",
+        "str",
+        "sum",
+        "super",
+        "tuple",
+        "type",
+        "TypeError",
+        "ValueError",
+        "vars",
+        "zip",
+    }
+)
+DUNDER_WHITELIST = frozenset(
+    {
+        "__name__",
+        "__doc__",
+        "__next__",
+        "__init__",
+        "__new__",
+        "__call__",
+        "__iter__",
+        "__slots__",
+        "__class__",
+        "__dict__",
+        "__await__",
+    }
+)
+RUNNERS = {"eval": eval, "exec": exec, "docs": eval}
+
+_executer = None
+
+
+def load_allowed_modules():
     with (
         pathlib.Path(__file__).parent / "allowed_modules.txt"
     ).open() as allowed_modules_file:
-        allowed_modules = list(
+        return list(
             line.strip() for line in allowed_modules_file.readlines() if line.strip()
         )
 
-    executer = Executer(
-        {
-            "__import__",
-            "__build_class__",
-            "ArithmeticError",
-            "AssertionError",
-            "AttributeError",
-            "BlockingIOError",
-            "BrokenPipeError",
-            "BufferError",
-            "BytesWarning",
-            "ChildProcessError",
-            "ConnectionAbortedError",
-            "ConnectionError",
-            "ConnectionRefusedError",
-            "ConnectionResetError",
-            "DeprecationWarning",
-            "EOFError",
-            "BaseException",
-            "Exception",
-            "Ellipsis",
-            "False",
-            "GeneratorExit",
-            "KeyboardInterrupt",
-            "None",
-            "NotImplemented",
-            "SystemExit",
-            "True",
-            "abs",
-            "all",
-            "any",
-            "ascii",
-            "bin",
-            "bool",
-            "bytearray",
-            "bytes",
-            "callable",
-            "chr",
-            "classmethod",
-            "complex",
-            "copyright",
-            "credits",
-            "delattr",
-            "dict",
-            "dir",
-            "divmod",
-            "enumerate",
-            "eval",
-            "exec",
-            "exit",
-            "filter",
-            "float",
-            "format",
-            "frozenset",
-            "getattr",
-            "globals",
-            "hasattr",
-            "hash",
-            "hex",
-            "id",
-            "input",
-            "int",
-            "isinstance",
-            "issubclass",
-            "iter",
-            "len",
-            "license",
-            "list",
-            "locals",
-            "map",
-            "max",
-            "min",
-            "NameError",
-            "next",
-            "object",
-            "oct",
-            "ord",
-            "pow",
-            "print",
-            "property",
-            "quit",
-            "range",
-            "repr",
-            "reversed",
-            "round",
-            "set",
-            "setattr",
-            "slice",
-            "sorted",
-            "staticmethod",
-            "str",
-            "sum",
-            "super",
-            "tuple",
-            "type",
-            "TypeError",
-            "ValueError",
-            "vars",
-            "zip",
-        },
-        {
-            "__name__",
-            "__doc__",
-            "__next__",
-            "__init__",
-            "__new__",
-            "__call__",
-            "__iter__",
-            "__slots__",
-            "__class__",
-            "__dict__",
-            "__await__",
-        },
-        allowed_modules,
-    )
+
+def create_executer():
+    return Executer(set(NAME_WHITELIST), set(DUNDER_WHITELIST), load_allowed_modules())
+
+
+def warm_up():
+    """Builds the executer for a pooled worker before its job arrives."""
+    global _executer
+    _executer = create_executer()
+
+
+def run_pooled_job(mode, data):
+    """Runs a job sent to a pooled worker using the executer built when it was warmed up."""
+    return run_job(_executer or create_executer(), mode, data)
+
+
+def run_job(executer, mode, data):
+    """Runs a single job with the output captured rather than written to the process's stdout & stderr. Returns the
+    result envelope: the captured output, the exit code, the time & CPU time the code took, the peak memory of the
+    process, and how many characters of output were dropped because there was too much."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        executer.run(
+            data["code"],
+            data["input"],
+            RUNNERS.get(mode, exec),
+            mode == "docs",
+            data.get("restricted", True),
+        )
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "stdout": stdout.getvalue(),
+        "exception": stderr.getvalue(),
+        "exit_code": executer.exit_code,
+        "wall_time": executer.wall_time,
+        "cpu_user": used.ru_utime - usage.ru_utime,
+        "cpu_sys": used.ru_stime - usage.ru_stime,
+        "peak_rss_kb": used.ru_maxrss,
+        "truncated_chars": executer.truncated_chars,
+    }
+
+
+if __name__ == "__main__":
+    executer = create_executer()
     data = json.loads(sys.stdin.read(-1))
-    runners = {"eval": eval, "exec": exec, "docs": eval}
-    arg = len(sys.argv) < 2 or sys.argv[1]
-    runner = runners.get(arg, exec)
-    executer.run(
-        data["code"], data["input"], runner, arg == "docs", data.get("restricted", True)
-    )
+    mode = sys.argv[1] if len(sys.argv) > 1 else "exec"
+    json.dump(run_job(executer, mode, data), sys.stdout)
@@ -0,0 +1,17 @@
+from typing import Optional, Tuple
+import black
+
+# Formats code with black on the runner pool's workers. Black is only ever imported here so the bot process doesn't
+# load it, its exceptions are turned into tags rather than being sent back since unpickling them would import black.
+
+
+def format_code(code: str) -> Tuple[str, Optional[str]]:
+    """Formats the code, returns ("ok", formatted code), ("unchanged", None), or ("invalid", the error message)."""
+    try:
+        formatted = black.format_file_contents(code, mode=black.FileMode(), fast=True)
+    except black.NothingChanged:
+        return "unchanged", None
+    except black.InvalidInput as exc:
+        return "invalid", str(exc)
+
+    return "ok", formatted
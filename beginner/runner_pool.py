@@ -0,0 +1,210 @@
+from __future__ import annotations
+from beginner.exceptions import BeginnerException
+from beginner.logging import get_logger
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Optional, Sequence, Set
+import asyncio
+import importlib
+import multiprocessing
+import resource
+
+
+# Modules that the fork server imports before forking any workers, shared by all pools since there's one fork server.
+# This module is always included since workers are started by unpickling a reference to _worker.
+_preload: Set[str] = {__name__}
+
+
+def _resolve(path: str) -> Callable:
+    """ Imports a callable using a "module:attribute" path. """
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _worker(conn: Connection, warm_up: Optional[str], cpu_limit: Optional[int]):
+    """Entry point of a pooled worker process. The pool's modules are imported by the fork server before the process
+    is forked so all that's left to do here is warm up and then wait for a single job."""
+    if warm_up:
+        _resolve(warm_up)()
+
+    try:
+        job, args, kwargs = conn.recv()
+    except EOFError:
+        return  # The pool was closed before a job was sent
+
+    if cpu_limit:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, hard))
+
+    try:
+        conn.send((True, _resolve(job)(*args, **kwargs)))
+    except Exception as exc:
+        conn.send((False, exc))
+    conn.close()
+
+
+@dataclass
+class RunnerWorker:
+    process: multiprocessing.Process
+    conn: Connection
+
+
+class RunnerPool:
+    """Keeps a pool of pre-forked worker processes ready to run jobs. The processes are forked from a fork server that
+    has already imported the pool's modules, so the interpreter startup & imports are only paid once. Each worker runs
+    a single job and is then discarded. Forking a worker waits on the fork server, so workers are forked on a thread
+    and the idle workers are topped back up in the background rather than while a job is waiting for one.
+
+    Jobs are given as "module:function" paths so that the modules they need never have to be imported by the bot. A
+    job that runs longer than the timeout is killed, and if a CPU limit is set the worker is killed by the OS once the
+    job has used that many seconds of CPU time."""
+
+    def __init__(
+        self,
+        size: int = 4,
+        queue_depth: int = 16,
+        timeout: float = 10.0,
+        preload: Sequence[str] = (),
+        warm_up: Optional[str] = None,
+        cpu_limit: Optional[int] = None,
+    ):
+        self._size = size
+        self._queue_depth = queue_depth
+        self._timeout = timeout
+        self._warm_up = warm_up
+        self._cpu_limit = cpu_limit
+        self._context = multiprocessing.get_context("forkserver")
+        _preload.update(preload)
+        self._context.set_forkserver_preload(sorted(_preload))
+        self._idle: deque[RunnerWorker] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._refilling: Optional[asyncio.Task] = None
+        self._closed = False
+        self._pending = 0
+        self._logger = get_logger(("beginner.py", "RunnerPool"))
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        """Starts forking the idle workers in the background, must be called from the event loop."""
+        self._closed = False
+        self._refill_soon()
+
+    def close(self):
+        self._closed = True
+        if self._refilling:
+            self._refilling.cancel()
+
+        while self._idle:
+            worker = self._idle.popleft()
+            worker.conn.close()
+            worker.process.kill()
+            worker.process.join()
+
+    async def run(self, job: str, *args, **kwargs) -> Any:
+        """Runs a job on the next available worker, waiting in the queue if all workers are busy. Returns what the job
+        returns, exceptions raised by the job are raised here."""
+        if self._pending >= self._size + self._queue_depth:
+            raise RunnerQueueFull(f"There are already {self._pending} jobs waiting")
+
+        if not self._slots:
+            self._slots = asyncio.Semaphore(self._size)
+
+        self._pending += 1
+        try:
+            async with self._slots:
+                worker = await self._checkout()
+                try:
+                    success, result = await self._send(worker, job, args, kwargs)
+                finally:
+                    self._retire(worker)
+                    self._refill_soon()
+        finally:
+            self._pending -= 1
+
+        if not success:
+            raise result
+
+        return result
+
+    async def _send(self, worker: RunnerWorker, job: str, args, kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        loop.add_reader(
+            worker.conn.fileno(), lambda: ready.done() or ready.set_result(True)
+        )
+        try:
+            worker.conn.send((job, args, kwargs))
+            await asyncio.wait_for(ready, self._timeout)
+            return worker.conn.recv()
+        except asyncio.TimeoutError:
+            worker.process.kill()
+            raise RunnerTimedOut(f"{job} took longer than {self._timeout} seconds")
+        except (EOFError, OSError):
+            await loop.run_in_executor(None, worker.process.join, 1)
+            self._logger.error(f"Worker exited with {worker.process.exitcode}")
+            raise RunnerCrashed(f"{job} exited unexpectedly")
+        finally:
+            loop.remove_reader(worker.conn.fileno())
+
+    async def _checkout(self) -> RunnerWorker:
+        while self._idle:
+            worker = self._idle.popleft()
+            if worker.process.is_alive():
+                return worker
+
+            self._retire(worker)
+
+        return await asyncio.get_running_loop().run_in_executor(None, self._spawn)
+
+    def _refill_soon(self):
+        if not self._closed and (not self._refilling or self._refilling.done()):
+            self._refilling = asyncio.get_running_loop().create_task(self._refill())
+
+    async def _refill(self):
+        loop = asyncio.get_running_loop()
+        while not self._closed and len(self._idle) < self._size:
+            worker = await loop.run_in_executor(None, self._spawn)
+            if self._closed:
+                self._retire(worker)
+                return
+
+            self._idle.append(worker)
+
+    def _retire(self, worker: RunnerWorker):
+        """Closes the worker's pipe and reaps its process on a thread so finished & killed workers don't linger."""
+        worker.conn.close()
+        asyncio.get_running_loop().run_in_executor(None, self._reap, worker.process)
+
+    def _reap(self, process: multiprocessing.Process):
+        process.join(self._timeout)
+        if process.exitcode is None:
+            process.kill()
+            process.join()
+        process.close()
+
+    def _spawn(self) -> RunnerWorker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker,
+            args=(child_conn, self._warm_up, self._cpu_limit),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return RunnerWorker(process, parent_conn)
+
+
+class RunnerQueueFull(BeginnerException):
+    pass
+
+
+class RunnerTimedOut(BeginnerException):
+    pass
+
+
+class RunnerCrashed(BeginnerException):
+    pass
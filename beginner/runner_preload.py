@@ -0,0 +1,54 @@
+import beginner.runner
+from beginner.memory import resident_memory
+from beginner.runner_rewrite.config import RunnerConfig
+from typing import Any, Dict, Iterable, List
+import importlib
+import pathlib
+import time
+
+# Imported by the runner pool's fork server so that every module user code is allowed to import is already loaded in
+# the workers forked from it. Importing this module anywhere else would load the runner, which clears os.environ.
+
+
+# Modules that do something when imported, they have to be imported by the user's code for that to happen
+SIDE_EFFECT_MODULES = frozenset({"antigravity", "this"})
+
+
+def modules_to_preload() -> List[str]:
+    config = RunnerConfig(
+        pathlib.Path(beginner.runner.__file__).parent / "config"
+    ).load_all()
+    modules = dict.fromkeys(beginner.runner.load_allowed_modules())
+    modules.update(dict.fromkeys(config.get("enabled_modules")))
+    return [name for name in modules if name not in SIDE_EFFECT_MODULES]
+
+
+def preload(modules: Iterable[str]) -> List[Dict[str, Any]]:
+    """Imports each module, recording how long it took and how much the process's resident memory grew. Modules that
+    can't be imported are skipped, the error is recorded in the report."""
+    report = []
+    for name in modules:
+        memory = resident_memory()
+        start = time.perf_counter()
+        error = None
+        try:
+            importlib.import_module(name)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+
+        report.append(
+            {
+                "module": name,
+                "seconds": time.perf_counter() - start,
+                "memory": resident_memory() - memory,
+                "error": error,
+            }
+        )
+    return report
+
+
+def get_report() -> List[Dict[str, Any]]:
+    return report
+
+
+report = preload(modules_to_preload())
@@ -1,9 +1,113 @@
+from collections import deque
+from typing import Deque, Tuple
 import io
 
 
-class RunnerOutputBuffer:
-    def __init__(self):
-        self.buffer = io.StringIO()
+class RunnerOutputBuffer(io.TextIOBase):
+    """Collects the output of the code being run, keeping only the first & last lines so that printing in an endless
+    loop can't use up the runner's memory. What's dropped between the head & tail is counted and noted in the output.
 
-    def __getattr__(self, item):
-        return getattr(self.buffer, item)
+    The tail is kept as the chunks that were written with their total length. Whole chunks are only dropped once
+    there's about twice as much as the tail needs, and the tail is cut down to its exact length & lines when the output
+    is read, so each write is cheap."""
+
+    def __init__(
+        self,
+        head_lines: int = 15,
+        head_chars: int = 497,
+        tail_lines: int = 17,
+        tail_chars: int = 504,
+    ):
+        self.head_lines = head_lines
+        self.head_chars = head_chars
+        self.tail_lines = tail_lines
+        self.tail_chars = tail_chars
+        self.head = ""
+        self._tail: Deque[str] = deque()
+        self._tail_length = 0
+        self._dropped_chars = 0
+        self._dropped_lines = 0
+        self._head_full = False
+
+    @property
+    def tail(self) -> str:
+        return self._trim_tail()[0]
+
+    @property
+    def dropped_chars(self) -> int:
+        return self._trim_tail()[1]
+
+    @property
+    def dropped_lines(self) -> int:
+        return self._trim_tail()[2]
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        length = len(text)
+        if not self._head_full:
+            text = self._write_head(text)
+
+        if text:
+            self._write_tail(text)
+
+        return length
+
+    def getvalue(self) -> str:
+        tail, dropped_chars, dropped_lines = self._trim_tail()
+        if not dropped_chars:
+            return self.head + tail
+
+        removed = (
+            f"{dropped_lines:,} lines" if dropped_lines else f"{dropped_chars:,} characters"
+        )
+        return f"{self.head.rstrip()}\n.\n.\nRemoved {removed}\n.\n.\n{tail}"
+
+    def _write_head(self, text: str) -> str:
+        """ Adds as much of the text as will fit to the head, returns what didn't fit. """
+        piece = text[: self.head_chars - len(self.head)]
+        end = -1
+        for _ in range(self.head_lines - self.head.count("\n")):
+            end = piece.find("\n", end + 1)
+            if end < 0:
+                break
+        else:
+            piece = piece[: end + 1]
+
+        self.head += piece
+        self._head_full = len(piece) < len(text)
+        return text[len(piece) :]
+
+    def _write_tail(self, text: str):
+        self._tail.append(text)
+        self._tail_length += len(text)
+        if self._tail_length <= 2 * self.tail_chars:
+            return
+
+        # Drop whole chunks that are entirely before the last tail_chars characters
+        while self._tail_length - len(self._tail[0]) >= self.tail_chars:
+            chunk = self._tail.popleft()
+            self._tail_length -= len(chunk)
+            self._dropped_chars += len(chunk)
+            self._dropped_lines += chunk.count("\n")
+
+    def _trim_tail(self) -> Tuple[str, int, int]:
+        """Cuts the tail down to the last tail_chars characters & tail_lines lines, returns it along with the total
+        number of characters & lines that were dropped."""
+        combined = "".join(self._tail)
+        kept = combined[-self.tail_chars :]
+        start = len(kept)
+        for _ in range(self.tail_lines):
+            start = kept.rfind("\n", 0, start)
+            if start < 0:
+                break
+        else:
+            kept = kept[start + 1 :]
+
+        dropped = len(combined) - len(kept)
+        return (
+            kept,
+            self._dropped_chars + dropped,
+            self._dropped_lines + combined.count("\n", 0, dropped),
+        )
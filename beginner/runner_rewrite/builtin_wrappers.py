@@ -1,6 +1,6 @@
-from beginner.runner.buffer import RunnerOutputBuffer
-from beginner.runner.config import RunnerConfig
-from beginner.runner.module_wrapper import ModuleWrapper, RunnerAttributeError
+from beginner.runner_rewrite.buffer import RunnerOutputBuffer
+from beginner.runner_rewrite.config import RunnerConfig
+from beginner.runner_rewrite.module_wrapper import ModuleWrapper, RunnerAttributeError
 from typing import Any, Callable, Dict, Tuple, Union
 import bevy
 
@@ -1,19 +1,54 @@
-from typing import Any, Dict, Callable, Optional
-from beginner.runner.config import RunnerConfig
-from beginner.runner.builtin_wrappers import RunnerBuiltinWrappers
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
+from beginner.runner_rewrite.config import RunnerConfig
+from beginner.runner_rewrite.builtin_wrappers import RunnerBuiltinWrappers
+import builtins
 import bevy
 
 
+# Enabled builtins resolved for each enabled builtins config: the config, the builtins that are used as is, and the
+# names of the builtins that are replaced by a wrapper along with the name of the wrapper
+_resolved: Dict[int, Tuple[Mapping[str, str], Mapping[str, Any], Tuple[Tuple[str, str], ...]]] = {}
+
+
 class RunnerBuiltins(bevy.Bevy, dict):
     config: RunnerConfig
     wrappers: RunnerBuiltinWrappers
 
     def __init__(self):
-        self.__enabled_builtins = self.config.get("enabled_builtins")
+        self.__plain_builtins, self.__wrapped_builtins = self._resolve(
+            self.config.get("enabled_builtins")
+        )
 
     def get_builtins(self) -> Dict[str, Any]:
-        builtins = {}
-        for name, value in __builtins__.items():
-            if name in self.__enabled_builtins:
-                builtins[name] = self.wrappers.get(self.__enabled_builtins[name], value)
-        return builtins
+        builtins_ = dict(self.__plain_builtins)
+        for name, wrapper in self.__wrapped_builtins:
+            builtins_[name] = self.wrappers.get(wrapper, getattr(builtins, name))
+        return builtins_
+
+    @staticmethod
+    def _resolve(
+        enabled: Mapping[str, str]
+    ) -> Tuple[Mapping[str, Any], Tuple[Tuple[str, str], ...]]:
+        """Looks up the enabled builtins once per config. The wrappers are bound to each run's output buffer so only
+        the names of the wrapped builtins can be resolved ahead of time."""
+        cached = _resolved.get(id(enabled))
+        if not cached or cached[0] is not enabled:
+            plain = {}
+            wrapped = []
+            for name, wrapper in enabled.items():
+                if not hasattr(builtins, name):
+                    continue
+
+                if wrapper and hasattr(RunnerBuiltinWrappers, wrapper):
+                    wrapped.append((name, wrapper))
+                else:
+                    plain[name] = getattr(builtins, name)
+
+            cached = _resolved[id(enabled)] = (
+                enabled,
+                MappingProxyType(plain),
+                tuple(wrapped),
+            )
+
+        return cached[1], cached[2]
@@ -1,12 +1,23 @@
-from typing import Any, Union
+from types import MappingProxyType
+from typing import Any, Dict, Union
 import json
 import pathlib
 
 
 class RunnerConfig:
+    """Loads the runner's JSON config files. Each file is only read & compiled once per process no matter how many
+    configs are created for its directory: objects become read only mappings and lists become frozensets so that the
+    whitelists can be checked in constant time.
+
+    The runner pool's fork server loads every config file up front, so the workers forked from it start with the
+    compiled configs rather than reading & parsing the JSON."""
+
+    # Compiled configs for each config directory, shared by every instance in the process
+    _compiled: Dict[pathlib.Path, Dict[str, Any]] = {}
+
     def __init__(self, config_path: Union[str, pathlib.Path]):
-        self._config_path = pathlib.Path(config_path)
-        self._config_cache = {}
+        self._config_path = pathlib.Path(config_path).resolve()
+        self._config_cache = self._compiled.setdefault(self._config_path, {})
 
     def get(self, name: str) -> Any:
         if name not in self._config_cache:
@@ -17,10 +28,25 @@ class RunnerConfig:
         self._load(name)
         return self.get(name)
 
+    def load_all(self) -> "RunnerConfig":
+        for path in self._config_path.glob("*.json"):
+            self._load(path.stem)
+        return self
+
     def _load(self, name: str):
         path = self._config_path / f"{name}.json"
         if not path.exists():
             raise FileNotFoundError(f"No such config file ({path.resolve()})")
 
         with open(path, "r") as json_file:
-            self._config_cache[name] = json.load(json_file)
+            self._config_cache[name] = _compile(json.load(json_file))
+
+
+def _compile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _compile(item) for key, item in value.items()})
+
+    if isinstance(value, list):
+        return frozenset(value)
+
+    return value
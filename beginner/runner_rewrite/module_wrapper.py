@@ -1,4 +1,4 @@
-from beginner.runner.config import RunnerConfig
+from beginner.runner_rewrite.config import RunnerConfig
 from typing import Any
 from types import ModuleType
 import bevy
@@ -12,8 +12,10 @@ class ModuleWrapper(bevy.Bevy):
             module  # Use dunder name so that our getattr code will protect it
         )
         self.__enabled_attributes = self.config.get("enabled_modules").get(
-            self.__protected_module__.__name__, []
+            self.__protected_module__.__name__, frozenset()
         )
+        self.__all_enabled = "*" in self.__enabled_attributes
+        self.__submodules = {}
 
         if not self.__enabled_attributes:
             raise RunnerImportError(
@@ -31,7 +33,9 @@ class ModuleWrapper(bevy.Bevy):
             )
 
         if isinstance(attr, ModuleType):
-            return ModuleWrapper.context(self.config).build(attr)
+            if name not in self.__submodules:
+                self.__submodules[name] = ModuleWrapper.context(self.config).build(attr)
+            return self.__submodules[name]
 
         return attr
 
@@ -52,7 +56,7 @@ class ModuleWrapper(bevy.Bevy):
         setattr(self.__protected_module__, name, value)
 
     def __enabled_attribute(self, name: str) -> bool:
-        return "*" in self.__enabled_attributes or name in self.__enabled_attributes
+        return self.__all_enabled or name in self.__enabled_attributes
 
 
 class RunnerImportError(ImportError):
@@ -1,11 +1,10 @@
-from beginner.runner.buffer import RunnerOutputBuffer
-from beginner.runner.builtins import RunnerBuiltins
-from beginner.runner.config import RunnerConfig
-from beginner.runner.resources import RunnerResourceLimits
-from beginner.runner.scanner import Scanner
-from beginner.runner.module_wrapper import RunnerAttributeError, RunnerImportError
-from typing import Any, Dict, Set
-import ast
+from beginner.runner_rewrite.buffer import RunnerOutputBuffer
+from beginner.runner_rewrite.builtins import RunnerBuiltins
+from beginner.runner_rewrite.config import RunnerConfig
+from beginner.runner_rewrite.resources import RunnerResourceLimits
+from beginner.runner_rewrite.scanner import Scanner
+from beginner.runner_rewrite.module_wrapper import RunnerAttributeError, RunnerImportError
+from typing import Any, Dict
 import bevy
 import io
 import pathlib
@@ -25,20 +24,22 @@ class Runner(bevy.Bevy):
         self.output = ""
         self.exception = ""
         self.exit_code = 0
+        self.dropped_chars = 0
 
     def run(self):
         try:
-            tree = ast.parse(self._code, "<discord>", self._mode)
+            scanner = Scanner.from_code(self._code, self._mode)
         except SyntaxError as exc:
             msg, (file, line_no, column, line) = exc.args
             spaces = " " * (column - 2)
             self.exception = f'File "{file}", line {line_no}\n{line.rstrip()}\n{spaces}^\nSyntaxError: {msg}'
             return
 
-        scanner = Scanner(tree)
-        disabled_attributes = self.disabled_dunder_attributes(scanner)
-        if disabled_attributes:
-            self.exception = f"AttributeError: Found disabled attributes ({', '.join(sorted(disabled_attributes))})"
+        violations = scanner.get_violations(
+            self.config.get("enabled_special_attributes")
+        )
+        if violations:
+            self.exception = "\n".join(violations)
             return
 
         self.preload_modules(scanner)
@@ -46,7 +47,7 @@ class Runner(bevy.Bevy):
         global_ns = self.build_globals()
         limits = None
         try:
-            code = compile(tree, "<discord>", self._mode)
+            code = compile(scanner.tree, "<discord>", self._mode)
             with RunnerResourceLimits() as limits:
                 if self._mode == "exec":
                     exec(code, global_ns, global_ns)
@@ -68,16 +69,12 @@ class Runner(bevy.Bevy):
             self.exception = limits.exception
 
         self.output = self.buffer.getvalue()
+        self.dropped_chars = self.buffer.dropped_chars
         self.buffer.close()
 
     def build_globals(self) -> Dict[str, Any]:
         return {"__name__": "__main__", "__builtins__": self.builtins.get_builtins()}
 
-    def disabled_dunder_attributes(self, scanner: Scanner) -> Set[str]:
-        attrs = scanner.get_dunder_attributes()
-        enabled_attributes = set(self.config.get("enabled_special_attributes"))
-        return attrs - enabled_attributes
-
     def preload_modules(self, scanner: Scanner):
         """ Preload modules since some will fail to load once resource limits are put in place. """
         for module in scanner.get_imports():
@@ -1,29 +1,81 @@
+from typing import Collection, List, Set
 import ast
-from typing import Set
 
 
 class Scanner:
+    """Collects everything the runner's security policy checks in a single pass over the syntax tree: the modules that
+    are imported, the dunder attributes that are accessed, and calls to __import__ that can't be checked before the
+    code runs."""
+
     def __init__(self, ast_object: ast.AST):
         self._ast = ast_object
+        self._imports: Set[str] = set()
+        self._dunder_attributes: Set[str] = set()
+        self._dynamic_imports: List[int] = []
+        self._scan()
+
+    @property
+    def tree(self) -> ast.AST:
+        return self._ast
+
+    @classmethod
+    def from_code(cls, code: str, mode: str, filename: str = "<discord>") -> "Scanner":
+        """ Parses & scans the code. Raises SyntaxError if the code can't be parsed. """
+        return cls(ast.parse(code, filename, mode))
 
     def get_imports(self) -> Set[str]:
-        modules = set()
+        return set(self._imports)
+
+    def get_dunder_attributes(self) -> Set[str]:
+        return set(self._dunder_attributes)
+
+    def get_dynamic_imports(self) -> List[int]:
+        """ Line numbers of __import__ calls that aren't passed a string literal. """
+        return list(self._dynamic_imports)
+
+    def get_violations(self, enabled_special_attributes: Collection[str]) -> List[str]:
+        """ Every way the code breaks the runner's policy, formatted as exception messages. """
+        violations = []
+        disabled = {
+            attr
+            for attr in self._dunder_attributes
+            if attr not in enabled_special_attributes
+        }
+        if disabled:
+            violations.append(
+                f"AttributeError: Found disabled attributes ({', '.join(sorted(disabled))})"
+            )
+
+        for line_no in self._dynamic_imports:
+            violations.append(
+                f"ImportError: __import__ must be passed a string literal (line {line_no})"
+            )
+
+        return violations
+
+    def _scan(self):
         for node in ast.walk(self._ast):
-            if isinstance(node, ast.Import):
-                modules.add(node.names[0].name)
+            if isinstance(node, ast.Attribute):
+                if node.attr.startswith("__"):
+                    self._dunder_attributes.add(node.attr)
+
+            elif isinstance(node, ast.Import):
+                self._imports.update(alias.name for alias in node.names)
+
             elif isinstance(node, ast.ImportFrom):
-                modules.add(node.module)
+                if node.module:
+                    self._imports.add(node.module)
+
             elif (
                 isinstance(node, ast.Call)
-                and hasattr(node.func, "id")
+                and isinstance(node.func, ast.Name)
                 and node.func.id == "__import__"
             ):
-                modules.add(node.args[0].n)
-        return modules
-
-    def get_dunder_attributes(self) -> Set[str]:
-        attributes = set()
-        for node in ast.walk(self._ast):
-            if isinstance(node, ast.Attribute) and node.attr.startswith("__"):
-                attributes.add(node.attr)
-        return attributes
+                if (
+                    node.args
+                    and isinstance(node.args[0], ast.Constant)
+                    and isinstance(node.args[0].value, str)
+                ):
+                    self._imports.add(node.args[0].value)
+                else:
+                    self._dynamic_imports.append(node.lineno)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Optional, Sequence
+
+
+# Upper bounds of the histogram buckets for each metric, values above the last bound go in an overflow bucket
+METRIC_BOUNDS = {
+    "wall_ms": (1, 2, 5, 10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000),
+    "cpu_ms": (1, 2, 5, 10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000),
+    "peak_rss_mb": (16, 24, 32, 48, 64, 96, 128, 192, 256, 512, 1_024),
+}
+
+
+class Histogram:
+    """Counts values in fixed buckets so that percentiles can be estimated without keeping every value."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """The upper bound of the bucket the percentile falls in, the largest value seen if it's in the overflow."""
+        if not self.count:
+            return None
+
+        target = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class RunnerTelemetry:
+    """Aggregates the result envelopes returned by the code runner into per mode histograms of wall time, CPU time,
+    and peak memory, along with counts of runs that failed or had their output truncated."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[str, Histogram]] = defaultdict(
+            lambda: {name: Histogram(bounds) for name, bounds in METRIC_BOUNDS.items()}
+        )
+        self._failed: Dict[str, int] = defaultdict(int)
+        self._truncated: Dict[str, int] = defaultdict(int)
+
+    @property
+    def modes(self):
+        return list(self._histograms)
+
+    def record(self, mode: str, envelope: Dict[str, Any]):
+        histograms = self._histograms[mode]
+        histograms["wall_ms"].add(envelope["wall_time"] * 1000)
+        histograms["cpu_ms"].add((envelope["cpu_user"] + envelope["cpu_sys"]) * 1000)
+        histograms["peak_rss_mb"].add(envelope["peak_rss_kb"] / 1024)
+        if envelope["exit_code"]:
+            self._failed[mode] += 1
+        if envelope["truncated_chars"]:
+            self._truncated[mode] += 1
+
+    def summary(self, mode: str) -> Dict[str, Any]:
+        histograms = self._histograms[mode]
+        return {
+            "runs": histograms["wall_ms"].count,
+            "failed": self._failed[mode],
+            "truncated": self._truncated[mode],
+            **{
+                name: {
+                    "mean": histogram.mean,
+                    "p50": histogram.percentile(50),
+                    "p95": histogram.percentile(95),
+                    "max": histogram.max,
+                }
+                for name, histogram in histograms.items()
+            },
+        }
@@ -4,18 +4,82 @@ from beginner.logging import get_logger
 from beginner.models.scheduler import Scheduler
 from beginner.tags import build_tag_set, fetch_tags
 from datetime import datetime, timedelta
-from typing import Any, AnyStr, Callable, Dict, Set, Union
+from typing import Any, AnyStr, Callable, Dict, List, Optional, Set, Tuple, Union
 import asyncio
+import heapq
 import pickle
 
 
 logger = get_logger(("beginner.py", "scheduler"))
 
 
+class SchedulerEngine:
+    """Keeps pending tasks in a heap ordered by when they should run and keeps a single timer that wakes up when the
+    next task is due. Tasks are only added once no matter how many times the database is synced, and a task is claimed
+    by deleting its row before it runs so it won't run twice."""
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, Scheduler]] = []
+        self._known: Set[int] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Loads any tasks from the database that aren't already pending and starts the timer."""
+        self._loop = loop
+        for task in Scheduler.select():
+            self.add(task)
+        self._set_timer()
+
+    def add(self, task: Scheduler):
+        if task.ID in self._known:
+            return
+
+        self._known.add(task.ID)
+        heapq.heappush(self._heap, (task.when, task.ID, task))
+        logger.debug(f"Scheduling {task.name} for {task.when}")
+        if self._heap[0][2] is task:
+            self._set_timer()
+
+    def _set_timer(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._heap and self._loop:
+            when = self._heap[0][0].replace(tzinfo=datetime.utcnow().tzinfo)
+            self._timer = self._loop.call_later(
+                max(0.0, _seconds_until_run(when)), self._wake
+            )
+
+    def _wake(self):
+        self._timer = None
+        while (
+            self._heap
+            and _seconds_until_run(
+                self._heap[0][0].replace(tzinfo=datetime.utcnow().tzinfo)
+            )
+            <= 0
+        ):
+            *_, task = heapq.heappop(self._heap)
+            self._known.discard(task.ID)
+            logger.debug(f"Triggering {task.name} running callbacks tagged {task.tag}")
+            logger.debug(f"- SCHEDULED FOR: {task.when}")
+            logger.debug(f"- RUNNING AT:    {datetime.now()}")
+            self._loop.create_task(_trigger_task(task))
+
+        self._set_timer()
+
+
+engine = SchedulerEngine()
+
+
 def initialize_scheduler(loop=asyncio.get_event_loop()):
-    """Loads scheduler tasks from the database and schedules them to run."""
-    for task in Scheduler.select():
-        loop.create_task(_schedule(task, pickle.loads(task.payload.encode())))
+    """Loads scheduler tasks from the database and schedules them to run. Safe to call on every reconnect."""
+    engine.start(loop)
 
 
 def schedule(
@@ -47,7 +111,7 @@ def schedule(
             f"Task {name} was scheduled for {when} which was {time} seconds ago ({datetime.now()})"
         )
     task = _schedule_save(name, when, tags, pickle.dumps(payload, 0).decode())
-    loop.create_task(_schedule(task, payload))
+    engine.add(task)
     return True
 
 
@@ -55,18 +119,6 @@ def task_scheduled(name):
     return _count_scheduled(name) > 0
 
 
-async def _schedule(task: Scheduler, payload: Dict):
-    """Schedules a task and calls the"""
-    time = _seconds_until_run(task.when.replace(tzinfo=datetime.utcnow().tzinfo))
-    logger.debug(f"Scheduling {task.name} for {task.when} {task.when.tzinfo} - {time}")
-    if time > 0:
-        await asyncio.sleep(time)
-    logger.debug(f"Triggering {task.name} running callbacks tagged {task.tag}")
-    logger.debug(f"- SCHEDULED FOR: {task.when}")
-    logger.debug(f"- RUNNING AT:    {datetime.now()}")
-    await _trigger_task(task, payload)
-
-
 def _count_scheduled(name: AnyStr) -> int:
     return Scheduler.select().where(Scheduler.name == name).count()
 
@@ -86,13 +138,18 @@ def _seconds_until_run(when: datetime) -> float:
     return (when - datetime.now()).total_seconds()
 
 
-async def _trigger_task(task: Scheduler, payload: Any):
-    """Runs the callbacks tagged for this task and removes the task from the database."""
+async def _trigger_task(task: Scheduler):
+    """Claims the task by removing it from the database and then runs the callbacks tagged for it. If the task has
+    already been claimed nothing is run."""
+    if not Scheduler.delete().where(Scheduler.ID == task.ID).execute():
+        logger.debug(f"{task.name} ({task.ID}) was already claimed")
+        return
+
     tags = set(task.tag.split(","))
-    name = task.name
-    task.delete_instance()
-    ran = await _run_tags(tags, payload)
-    logger.debug(f"Attempted to run {ran} callback{'s' if ran > 1 else ''} for {name}")
+    ran = await _run_tags(tags, pickle.loads(task.payload.encode()))
+    logger.debug(
+        f"Attempted to run {ran} callback{'s' if ran > 1 else ''} for {task.name}"
+    )
 
 
 async def _run_tags(tags: Set, payload: Dict):
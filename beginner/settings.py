@@ -1,6 +1,8 @@
 from beginner.models.settings import Settings as SettingsModel
-from typing import Any, AnyStr, Optional
+from typing import Any, AnyStr, Dict, Optional
 import pickle
+import threading
+import time
 
 
 class NOT_SET_TYPE:
@@ -18,42 +20,80 @@ class NOT_SET_TYPE:
 
 
 class Settings:
+    """Key/value settings stored in the database. The pickled values of all settings are loaded into a cache that is
+    shared by every instance, writes go through to both the database & the cache. Values are unpickled on every read
+    so each caller gets its own copy. The cache is reloaded once it is older than max_age so that changes made by
+    other processes are eventually picked up. It's used from both the event loop & the database threads so it's
+    guarded by a lock."""
+
     NOT_SET = NOT_SET_TYPE()
     ERROR = NOT_SET_TYPE("ERROR")
 
+    max_age = 300
+    _cache: Dict[str, str] = {}
+    _loaded_at: Optional[float] = None
+    _lock = threading.RLock()
+
     def _get(self, name: AnyStr) -> Any:
-        result = SettingsModel.select(SettingsModel.value).where(
-            SettingsModel.name == name
-        )
-        value = Settings.NOT_SET
-        if result.count():
-            try:
-                value = pickle.loads(result.scalar().encode())
-            except pickle.UnpicklingError:
-                return Settings.ERROR
+        with Settings._lock:
+            self._load()
+            pickled = Settings._cache.get(name)
 
-        return value
+        if pickled is None:
+            return Settings.NOT_SET
+
+        try:
+            return self._load_pickle(pickled)
+        except pickle.UnpicklingError:
+            return Settings.ERROR
 
     def _set(self, name: AnyStr, value: Any):
-        pickled = pickle.dumps(value, 0)
-        if self._get(name) is Settings.NOT_SET:
-            SettingsModel(name=name, value=pickled).save()
-        else:
-            SettingsModel.update(value=pickled).where(
-                SettingsModel.name == name
-            ).execute()
+        pickled = pickle.dumps(value, 0).decode()
+        with Settings._lock:
+            self._load()
+            if name not in Settings._cache:
+                SettingsModel(name=name, value=pickled).save()
+            else:
+                SettingsModel.update(value=pickled).where(
+                    SettingsModel.name == name
+                ).execute()
+
+            Settings._cache[name] = pickled
 
     def all(self):
-        return {
-            row.name: self._load_pickle(row.value)
-            for row in SettingsModel.select().distinct()
+        with Settings._lock:
+            self._load(force=True)
+            cache = dict(Settings._cache)
+
+        settings = {}
+        for name, pickled in cache.items():
+            try:
+                settings[name] = self._load_pickle(pickled)
+            except pickle.UnpicklingError:
+                settings[name] = "FAILED TO UNPICKLE"
+        return settings
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._loaded_at = None
+
+    def _load(self, force: bool = False):
+        if (
+            not force
+            and Settings._loaded_at is not None
+            and time.monotonic() - Settings._loaded_at < Settings.max_age
+        ):
+            return
+
+        Settings._cache = {
+            row.name: row.value
+            for row in SettingsModel.select(SettingsModel.name, SettingsModel.value)
         }
+        Settings._loaded_at = time.monotonic()
 
-    def _load_pickle(self, data):
-        try:
-            return pickle.loads(data.encode())
-        except pickle.UnpicklingError:
-            return "FAILED TO UNPICKLE"
+    def _load_pickle(self, data: str) -> Any:
+        return pickle.loads(data.encode())
 
     def get(self, name: AnyStr, default: Optional[Any] = None) -> Any:
         return default if (value := self._get(name)) is Settings.NOT_SET else value
@@ -0,0 +1,85 @@
+"""Benchmarks the code runner's policy checks on large scripts. The old checks walked the syntax tree once for imports,
+once for the rewrite runner's dunder attributes, and once more for the legacy runner's dunder attributes. The scanner
+collects everything in a single walk.
+
+Run from the project root:
+    python -m benchmarks.ast_policy [--functions 2000]
+"""
+from beginner.runner_rewrite.scanner import Scanner
+from typing import Callable, Set
+import argparse
+import ast
+import statistics
+import time
+
+
+def generate_script(num_functions: int) -> str:
+    lines = ["import math, random", "from itertools import chain"]
+    for index in range(num_functions):
+        lines.extend(
+            (
+                f"def function_{index}(values):",
+                f"    total = sum(math.sqrt(value) for value in values if value > {index})",
+                f"    name = function_{index}.__name__",
+                "    return [chain(values, [total]), name, __import__('string').digits]",
+            )
+        )
+    return "\n".join(lines)
+
+
+def separate_walks(code: str):
+    """ The checks as they were done before the scanner, a parse followed by three walks. """
+    tree = ast.parse(code, "<discord>", "exec")
+    imports: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.add(node.names[0].name)
+        elif isinstance(node, ast.ImportFrom):
+            imports.add(node.module)
+        elif (
+            isinstance(node, ast.Call)
+            and hasattr(node.func, "id")
+            and node.func.id == "__import__"
+        ):
+            imports.add(node.args[0].value)
+
+    for _ in range(2):
+        attributes = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and node.attr.startswith("__"):
+                attributes.add(node.attr)
+
+
+def single_walk(code: str):
+    Scanner(ast.parse(code, "<discord>", "exec")).get_violations(frozenset())
+
+
+def measure(check: Callable[[str], None], code: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        check(code)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--functions", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    code = generate_script(args.functions)
+    print(f"Script is {len(code):,} characters, {code.count(chr(10)) + 1:,} lines")
+    baseline = measure(separate_walks, code, args.repeat)
+    print(f"{'Check':<20}{'Time (ms)':>12}{'Speedup':>10}")
+    for name, check in (
+        ("separate walks", separate_walks),
+        ("single walk", single_walk),
+    ):
+        timing = measure(check, code, args.repeat)
+        print(f"{name:<20}{timing:>12.3f}{baseline / timing:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Benchmarks the queries the bot runs against the tables that are indexed by the schema migrations. A SQLite database
+is seeded with generated data, each query is timed, the migrations are applied, and each query is timed again.
+
+Run from the project root:
+    python -m benchmarks.database_indexes [--points 200000]
+"""
+from beginner.models import SqliteDatabase, fn, run_migrations
+from beginner.models.contestants import ContestantInfo
+from beginner.models.mod_actions import ModAction
+from beginner.models.points import Points
+from beginner.models.scheduler import Scheduler
+from beginner.models.settings import Settings
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+import argparse
+import pathlib
+import random
+import statistics
+import tempfile
+import time
+
+
+def seed(num_points: int):
+    rand = random.Random(0)
+    now = datetime.utcnow()
+    users = max(num_points // 50, 10)
+    rows = (
+        {
+            "awarded": now - timedelta(minutes=rand.randrange(60 * 24 * 365)),
+            "user_id": rand.randrange(users),
+            "giver_id": rand.randrange(users),
+            "message_id": index,
+            "points": rand.choice((2, 4, 8)),
+            "point_type": rand.choice(("KUDOS", "KUDOS", "KUDOS", "BUMP")),
+        }
+        for index in range(num_points)
+    )
+    _insert(Points, rows)
+    _insert(
+        ModAction,
+        (
+            {
+                "action_type": "WARN",
+                "user_id": rand.randrange(users),
+                "mod_id": 1,
+                "details": "",
+                "datetime": now,
+            }
+            for _ in range(num_points // 10)
+        ),
+    )
+    _insert(
+        Settings,
+        ({"name": f"setting.{index}", "value": "I0\n."} for index in range(2_000)),
+    )
+    _insert(
+        ContestantInfo,
+        (
+            {"original_author_id": index, "bot_message_id": index}
+            for index in range(num_points // 20)
+        ),
+    )
+    _insert(
+        Scheduler,
+        (
+            {"name": f"task-{index}", "when": now, "tag": "t", "payload": ""}
+            for index in range(num_points // 40)
+        ),
+    )
+
+
+def _insert(model, rows):
+    rows = list(rows)
+    with model._meta.database.atomic():
+        for start in range(0, len(rows), 500):
+            model.insert_many(rows[start : start + 500]).execute()
+
+
+def queries(num_points: int) -> Dict[str, Callable]:
+    user = 7
+    since = datetime.utcnow() - timedelta(hours=2)
+    return {
+        "kudos given since": lambda: list(
+            Points.select(Points.awarded, Points.points).where(
+                Points.giver_id == user,
+                Points.point_type == "KUDOS",
+                Points.awarded >= since,
+            )
+        ),
+        "user kudos total": lambda: Points.select(fn.SUM(Points.points))
+        .where(Points.user_id == user, Points.point_type == "KUDOS")
+        .scalar(),
+        "kudos on message": lambda: list(
+            Points.select().where(
+                Points.message_id == num_points // 2, Points.giver_id == user
+            )
+        ),
+        "mod action history": lambda: list(
+            ModAction.select()
+            .where(ModAction.user_id == user)
+            .order_by(ModAction.datetime.desc())
+        ),
+        "setting by name": lambda: Settings.select(Settings.value)
+        .where(Settings.name == "setting.1999")
+        .scalar(),
+        "contestant by message": lambda: ContestantInfo.get_or_none(
+            ContestantInfo.bot_message_id == num_points // 40
+        ),
+        "tasks scheduled": lambda: Scheduler.select()
+        .where(Scheduler.name == "task-1")
+        .count(),
+    }
+
+
+def measure(query: Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = SqliteDatabase(pathlib.Path(directory) / "benchmark.sqlite.db")
+        models = [Points, ModAction, Settings, ContestantInfo, Scheduler]
+        db.bind(models)
+        db.create_tables(models)
+        print(f"Seeding {args.points:,} points rows")
+        seed(args.points)
+
+        benchmarks = queries(args.points)
+        before = {name: measure(query, args.repeat) for name, query in benchmarks.items()}
+        run_migrations(db)
+        after = {name: measure(query, args.repeat) for name, query in benchmarks.items()}
+
+        print(f"{'Query':<24}{'Before (ms)':>14}{'After (ms)':>14}{'Speedup':>10}")
+        for name in benchmarks:
+            print(
+                f"{name:<24}{before[name]:>14.3f}{after[name]:>14.3f}"
+                f"{before[name] / after[name]:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmarks looking up a guild's channels, roles, and emojis by name. The cogs used to search the guild's lists on
+every lookup, lowercasing each role name as they went. The guild index builds name maps once and keeps them until an
+entity of that kind changes.
+
+Run from the project root:
+    python -m benchmarks.guild_lookups [--roles 5000] [--channels 5000]
+"""
+from beginner.guild_index import GuildIndex
+from types import SimpleNamespace
+from typing import Any, Callable, List
+import argparse
+import random
+import statistics
+import time
+
+
+def generate_guild(num_roles: int, num_channels: int, num_emojis: int) -> Any:
+    channels = [SimpleNamespace(name=f"channel-{n}") for n in range(num_channels)]
+    return SimpleNamespace(
+        id=644299523686006834,
+        channels=channels,
+        categories=[SimpleNamespace(name=f"Category {n}") for n in range(50)],
+        roles=[SimpleNamespace(name=f"Role {n}") for n in range(num_roles)],
+        emojis=[SimpleNamespace(name=f"emoji_{n}") for n in range(num_emojis)],
+    )
+
+
+def linear_search(search: List, name: str, preserve_case: bool = True):
+    """ The lookup as it was done before the index. """
+    for element in search:
+        ename = element.name if preserve_case else element.name.lower()
+        if ename == name:
+            return element
+    return None
+
+
+def measure(lookup: Callable[[str], Any], names: List[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name in names:
+            lookup(name)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) / len(names) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--roles", type=int, default=5_000)
+    parser.add_argument("--channels", type=int, default=5_000)
+    parser.add_argument("--emojis", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    guild = generate_guild(args.roles, args.channels, args.emojis)
+    roles = [f"role {random.randrange(args.roles)}" for _ in range(args.lookups)]
+    channels = [
+        f"channel-{random.randrange(args.channels)}" for _ in range(args.lookups)
+    ]
+    index = GuildIndex()
+
+    start = time.perf_counter()
+    for kind in ("channels", "categories", "roles", "emojis"):
+        index.get(guild, kind, "")
+    print(f"Building the indexes took {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    print(f"{'Lookup':<20}{'Linear (µs)':>14}{'Indexed (µs)':>14}{'Speedup':>10}")
+    for name, names, linear, indexed in (
+        (
+            "role",
+            roles,
+            lambda role: linear_search(guild.roles, role, preserve_case=False),
+            lambda role: index.get(guild, "roles", role, preserve_case=False),
+        ),
+        (
+            "channel",
+            channels,
+            lambda channel: linear_search(guild.channels, channel),
+            lambda channel: index.get(guild, "channels", channel),
+        ),
+    ):
+        linear_time = measure(linear, names, args.repeat)
+        indexed_time = measure(indexed, names, args.repeat)
+        print(
+            f"{name:<20}{linear_time:>14.2f}{indexed_time:>14.3f}"
+            f"{linear_time / indexed_time:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Benchmarks the code sandboxes against a corpus of representative snippets. Measures the cold & warm latency and peak
+resident memory of the legacy runner (both as a fresh process and on the warm runner pool), the rewrite runner, the
+brainfuck interpreter, and black, along with the throughput of the runner pool. Everything runs locally.
+
+Run from the project root:
+    python -m benchmarks.sandbox [--repeat 10] [--output results.json]
+"""
+from beginner.brainfuck_runner import BrainfuckInterpreter
+from beginner.runner_pool import RunnerPool
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+PYTHON_SNIPPETS = {
+    "hello world": 'print("Hello, World!")',
+    "numpy": "import numpy as np\nprint(np.arange(1_000_000).reshape(1000, 1000).sum(axis=0)[:5])",
+    "recursion": "def fib(n):\n    return n if n < 2 else fib(n - 1) + fib(n - 2)\nprint(fib(20))",
+    "heavy print": "for i in range(100_000):\n    print(i)",
+    "import heavy": (
+        "import collections, datetime, decimal, fractions, itertools, json, re, statistics, typing, unittest\n"
+        "print(statistics.mean(decimal.Decimal(n) for n in range(100)))"
+    ),
+}
+
+BRAINFUCK_SNIPPETS = {
+    "hello world": (
+        "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.>>+.>++."
+    ),
+    "large program": "".join(
+        f"{'+' * (n % 7 + 1)}[>{'+' * (n % 5 + 2)}<-]>.<" for n in range(5_000)
+    ),
+    "nested loops": "++++++++[>++++++++[>++++++++[>+>-<<-]<-]<-]>>>.",
+}
+
+FORMAT_SNIPPETS = {
+    "small": "x = {  'a':37,'b':42,\n'c':927}\ny = 'hello ''world'\n",
+    "large": "\n".join(
+        f"def function_{n}(a,b ,c):\n  return [a+b  ,c*{n},{{'key':a}}]\n" for n in range(500)
+    ),
+}
+
+
+def summarize(
+    latencies: List[float], peak_rss_kb: int, errors: List[str]
+) -> Dict[str, Any]:
+    return {
+        "cold_ms": latencies[0] * 1000,
+        "warm_ms": statistics.median(latencies[1:] or latencies) * 1000,
+        "min_ms": min(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "peak_rss_kb": peak_rss_kb,
+        "runs": len(latencies),
+        "errors": sorted(set(errors)),
+    }
+
+
+def bench_runner_cold(repeat: int) -> Dict[str, Any]:
+    """ Runs each snippet as a fresh runner process, the way the local Lambda client does. """
+    results = {}
+    for name, code in PYTHON_SNIPPETS.items():
+        latencies, peak, errors = [], 0, []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "beginner.runner", "exec"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            stdout, _ = proc.communicate(
+                json.dumps({"code": code, "input": ""}).encode()
+            )
+            latencies.append(time.perf_counter() - start)
+            envelope = json.loads(stdout)
+            peak = max(peak, envelope["peak_rss_kb"])
+            if envelope["exception"].strip():
+                errors.append(envelope["exception"].strip().splitlines()[-1])
+        results[name] = summarize(latencies, peak, errors)
+    return results
+
+
+async def bench_runner_pool(repeat: int, concurrency: int) -> Dict[str, Any]:
+    pool = RunnerPool(
+        size=concurrency,
+        queue_depth=concurrency * repeat,
+        preload=["beginner.runner_preload"],
+        warm_up="beginner.runner:warm_up",
+    )
+    start = time.perf_counter()
+    pool.start()
+    await pool.run("beginner.runner_preload:get_report")
+    results: Dict[str, Any] = {"startup_ms": (time.perf_counter() - start) * 1000}
+    try:
+        for name, code in PYTHON_SNIPPETS.items():
+            latencies, peak, errors = [], 0, []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                envelope = await pool.run(
+                    "beginner.runner:run_pooled_job",
+                    "exec",
+                    {"code": code, "input": ""},
+                )
+                latencies.append(time.perf_counter() - start)
+                peak = max(peak, envelope["peak_rss_kb"])
+                if envelope["exception"].strip():
+                    errors.append(envelope["exception"].strip().splitlines()[-1])
+            results[name] = summarize(latencies, peak, errors)
+
+        jobs = concurrency * repeat
+        data = {"code": PYTHON_SNIPPETS["hello world"], "input": ""}
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                pool.run("beginner.runner:run_pooled_job", "exec", data)
+                for _ in range(jobs)
+            )
+        )
+        results["throughput_per_second"] = jobs / (time.perf_counter() - start)
+    finally:
+        pool.close()
+
+    return results
+
+
+def bench_in_process(
+    snippets: Dict[str, str], run: Callable[[str], Any], repeat: int
+) -> Dict[str, Any]:
+    results = {}
+    for name, code in snippets.items():
+        latencies, peak, errors = [], 0, []
+        for _ in range(repeat):
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                run(code)
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {exc}")
+            latencies.append(time.perf_counter() - start)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] // 1024)
+            tracemalloc.stop()
+        results[name] = summarize(latencies, peak, errors)
+        results[name]["peak_traced_kb"] = results[name].pop("peak_rss_kb")
+    return results
+
+
+def bench_runner_rewrite(repeat: int) -> Dict[str, Any]:
+    try:
+        from beginner.runner_rewrite.config import RunnerConfig
+        from beginner.runner_rewrite.runner import Runner
+    except ImportError as exc:
+        return {"skipped": f"{type(exc).__name__}: {exc}"}
+
+    config = RunnerConfig(os.path.join("beginner", "config"))
+    return bench_in_process(
+        PYTHON_SNIPPETS,
+        lambda code: Runner.context(config).build(code, "exec").run(),
+        repeat,
+    )
+
+
+def bench_black(repeat: int) -> Dict[str, Any]:
+    try:
+        import black
+    except ImportError as exc:
+        return {"skipped": f"{type(exc).__name__}: {exc}"}
+
+    def format_code(code: str):
+        try:
+            black.format_file_contents(code, mode=black.FileMode(), fast=True)
+        except black.NothingChanged:
+            pass
+
+    return bench_in_process(FORMAT_SNIPPETS, format_code, repeat)
+
+
+def print_table(results: Dict[str, Any]):
+    print(f"{'Engine':<16}{'Snippet':<16}{'Cold (ms)':>11}{'Warm (ms)':>11}{'Peak (KiB)':>12}  Errors")
+    for engine, snippets in results["engines"].items():
+        if "skipped" in snippets:
+            print(f"{engine:<16}skipped ({snippets['skipped']})")
+            continue
+
+        for snippet, result in snippets.items():
+            if not isinstance(result, dict):
+                print(f"{engine:<16}{snippet:<16}{result:>11.1f}")
+                continue
+
+            peak = result.get("peak_rss_kb", result.get("peak_traced_kb"))
+            print(
+                f"{engine:<16}{snippet:<16}{result['cold_ms']:>11.2f}{result['warm_ms']:>11.2f}"
+                f"{peak:>12,}  {'; '.join(result['errors'])}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "repeat": args.repeat,
+        "engines": {
+            "runner cold": bench_runner_cold(args.repeat),
+            "runner pool": asyncio.run(
+                bench_runner_pool(args.repeat, args.concurrency)
+            ),
+            "runner rewrite": bench_runner_rewrite(args.repeat),
+            "brainfuck": bench_in_process(
+                BRAINFUCK_SNIPPETS,
+                lambda code: BrainfuckInterpreter(code).run(),
+                args.repeat,
+            ),
+            "black": bench_black(args.repeat),
+        },
+    }
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from beginner.models import DateTimeField, SqliteDatabase, set_database
+from beginner.models.kudos_pool import KudosPool
+from beginner.models.points import Points
+from datetime import datetime, timedelta
+import beginner.kudos as kudos
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def database(monkeypatch):
+    set_database(SqliteDatabase(":memory:"), max_workers=1)
+    # Postgres returns datetimes, SQLite returns strings with seconds that the minute format Points uses can't parse
+    monkeypatch.setattr(Points.awarded, "formats", DateTimeField.formats)
+    monkeypatch.setattr(kudos, "_totals_built", False)
+
+
+def give_history(giver_id: int, message_id: int, points: int, minutes_ago: int):
+    Points.create(
+        awarded=datetime.utcnow() - timedelta(minutes=minutes_ago),
+        user_id=1,
+        giver_id=giver_id,
+        message_id=message_id,
+        points=points,
+        point_type="KUDOS",
+    )
+
+
+def test_first_gift_without_a_pool_is_only_taken_once():
+    assert kudos.give_kudos_from_pool(4, 1, 2, 100, 10, 12) == 6
+    assert KudosPool.get(KudosPool.giver_id == 2).balance == 6
+    assert kudos.get_user_kudos(1) == 4
+
+
+def test_pool_without_a_row_is_seeded_from_history():
+    give_history(2, 99, 2, minutes_ago=1)
+    assert kudos.give_kudos_from_pool(4, 1, 2, 100, 10, 12) == 4
+
+
+def test_replacing_kudos_without_a_pool_refunds_them_once():
+    give_history(2, 100, 2, minutes_ago=1)
+    assert kudos.give_kudos_from_pool(4, 1, 2, 100, 10, 12) == 6
+    assert kudos.get_user_kudos(1) == 4
+
+
+def test_gift_larger_than_the_pool_changes_nothing():
+    assert kudos.give_kudos_from_pool(12, 1, 2, 100, 10, 12) is None
+    assert kudos.get_user_kudos(1) == 0
+    assert not Points.select().exists()
+
+
+def test_refund_without_a_pool_is_only_refunded_once():
+    give_history(2, 100, 4, minutes_ago=1)
+    kudos.refund_kudos(100, 2, 10, 12)
+    assert KudosPool.get(KudosPool.giver_id == 2).balance == 10
+    assert kudos.get_kudos_left(2, 10, 12) == 10